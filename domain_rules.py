@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Domain policy shared by the proxy server and the OpenCode plugin
+"""
+
+import functools
+from typing import Iterable, Optional
+
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase a host or config entry and drop the fully qualified trailing dot"""
+    return domain.lower().rstrip(".")
+
+
+def domain_set(domains: Optional[Iterable[str]]) -> frozenset:
+    """Normalized config entries (a null YAML list counts as empty)"""
+    return frozenset(normalize_domain(d) for d in domains or [] if d)
+
+
+@functools.lru_cache(maxsize=8192)
+def domain_suffixes(host: str) -> tuple:
+    """Label-boundary suffixes of a host: a.b.com -> (a.b.com, b.com, com)"""
+    labels = normalize_domain(host).split(".")
+    return tuple(".".join(labels[i:]) for i in range(len(labels)))
+
+
+def is_domain_allowed(host: str, blocked: frozenset, allowed: frozenset) -> bool:
+    """Apply the block/allow lists; an entry matches a host and its subdomains"""
+    suffixes = domain_suffixes(host)
+    if not blocked.isdisjoint(suffixes):
+        return False
+    if allowed and allowed.isdisjoint(suffixes):
+        return False
+    return True
@@ -2,50 +2,90 @@
 '''
 Housekeeping script for SHADOW Proxy
 '''
-import requests
+import urllib3
 import json
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared pool so both calls reuse connections to the proxy
+_pool = urllib3.PoolManager(num_pools=2, maxsize=2, retries=False)
+
+def _housekeeping_lines(result):
+    return [
+        f"✅ Housekeeping complete",
+        f"   Intelligence files deleted: {result.get('intelligence_cleanup', {}).get('deleted', 0)}",
+        f"   Intelligence records pruned: {result.get('intelligence_cleanup', {}).get('records_deleted', 0)}",
+        f"   Log files rotated: {result.get('log_rotation', {}).get('rotated', 0)}",
+    ]
+
+def _blocked_lines(data):
+    total = data.get('total', 0)
+    recent = data.get('recent_count', 0)
+
+    lines = [f"📊 Blocked requests summary:", f"   Total: {total}", f"   Recent: {recent}"]
+
+    if recent > 0:
+        lines.append("   Recent blocked:")
+        for req in data.get('blocked_requests', [])[-3:]:
+            lines.append(f"      {req.get('reason', 'Unknown')}: {req.get('url', 'Unknown')[:50]}")
+    return lines
+
+def run_maintenance():
+    '''Cleanup and blocked-request stats in one call; None if the server lacks it'''
+    response = _pool.request("POST", "http://localhost:8081/maintenance/run",
+                             body=json.dumps({"include_blocked": True, "blocked_limit": 10}),
+                             headers={"Content-Type": "application/json"},
+                             timeout=urllib3.Timeout(connect=3, read=30))
+    if response.status == 404:
+        return None
+    if response.status != 200:
+        return [f"❌ Maintenance failed: {response.status}"]
+
+    result = json.loads(response.data)
+    return (["🧹 Running proxy housekeeping..."] + _housekeeping_lines(result["cleanup"])
+            + ["🔍 Checking blocked requests..."] + _blocked_lines(result["blocked"]))
 
 def run_housekeeping():
-    print("🧹 Running proxy housekeeping...")
-    
+    lines = ["🧹 Running proxy housekeeping..."]
+
     try:
         # Clean up obsolete files
-        response = requests.post("http://localhost:8081/housekeeping/cleanup", timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Housekeeping complete")
-            print(f"   Intelligence files deleted: {result.get('intelligence_cleanup', {}).get('deleted', 0)}")
-            print(f"   Log files rotated: {result.get('log_rotation', {}).get('rotated', 0)}")
+        response = _pool.request("POST", "http://localhost:8081/housekeeping/cleanup",
+                                 timeout=urllib3.Timeout(connect=3, read=30))
+        if response.status == 200:
+            lines.extend(_housekeeping_lines(json.loads(response.data)))
         else:
-            print(f"❌ Housekeeping failed: {response.status_code}")
+            lines.append(f"❌ Housekeeping failed: {response.status}")
     except Exception as e:
-        print(f"❌ Housekeeping error: {e}")
+        lines.append(f"❌ Housekeeping error: {e}")
+    return lines
 
 def check_blocked_requests():
-    print("🔍 Checking blocked requests...")
-    
+    lines = ["🔍 Checking blocked requests..."]
+
     try:
-        response = requests.get("http://localhost:8081/blocked/requests?limit=10", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            total = data.get('total', 0)
-            recent = data.get('recent_count', 0)
-            
-            print(f"📊 Blocked requests summary:")
-            print(f"   Total: {total}")
-            print(f"   Recent: {recent}")
-            
-            if recent > 0:
-                print("   Recent blocked:")
-                for req in data.get('blocked_requests', [])[-3:]:
-                    print(f"      {req.get('reason', 'Unknown')}: {req.get('url', 'Unknown')[:50]}")
+        response = _pool.request("GET", "http://localhost:8081/blocked/requests?limit=10",
+                                 timeout=urllib3.Timeout(connect=3, read=10))
+        if response.status == 200:
+            lines.extend(_blocked_lines(json.loads(response.data)))
         else:
-            print(f"❌ Blocked requests check failed: {response.status_code}")
+            lines.append(f"❌ Blocked requests check failed: {response.status}")
     except Exception as e:
-        print(f"❌ Blocked requests error: {e}")
+        lines.append(f"❌ Blocked requests error: {e}")
+    return lines
 
 if __name__ == "__main__":
-    run_housekeeping()
-    check_blocked_requests()
+    try:
+        lines = run_maintenance()
+    except Exception:
+        lines = None
+
+    if lines is None:
+        # Older server: both calls are independent, so run them together
+        tasks = [run_housekeeping, check_blocked_requests]
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [executor.submit(task) for task in tasks]
+        lines = [line for future in futures for line in future.result()]
+
+    print("\n".join(lines))
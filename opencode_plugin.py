@@ -7,12 +7,40 @@ Implements a proper OpenCode plugin that intercepts webfetch operations.
 import sys
 import os
 import json
+import asyncio
+import builtins
+import concurrent.futures
+import functools
+import hashlib
+import itertools
 import time
 import logging
+import zlib
 import threading
+from collections import deque
 from typing import Dict, Any, List, Optional, Callable
+from dataclasses import dataclass
 from pathlib import Path
+from urllib.parse import urlparse
+import aiohttp
+import cachetools
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from domain_rules import domain_set, is_domain_allowed
+
+# Optional: without them the plugin runs on defaults and skips caching
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +54,93 @@ logging.basicConfig(
 logger = logging.getLogger("OpenCodeWebFetchPlugin")
 
 
+# webfetch kwargs that map straight onto requests.Session.request options
+_REQUESTS_PASSTHROUGH = frozenset(
+    {"params", "cookies", "auth", "allow_redirects", "proxies", "verify", "cert"}
+)
+
+
+# Fields every proxy /fetch payload shares, serialized once
+_PROXY_PAYLOAD_PREFIX = orjson.dumps(
+    {"cache_enabled": True, "intelligence_tags": ["opencode", "plugin"]}
+)[:-1] + b","
+
+
+# Cached results are stored as a format byte followed by the payload
+_CACHE_FORMAT_ZLIB_JSON = b"\x01"
+
+
+def _pack_cached(result: Dict[str, Any]) -> bytes:
+    """Serialize a result for Redis: zlib-compressed JSON behind a version byte"""
+    return _CACHE_FORMAT_ZLIB_JSON + zlib.compress(orjson.dumps(result), 1)
+
+
+def _unpack_cached(raw: bytes) -> Dict[str, Any]:
+    """Inverse of _pack_cached; plain JSON values from older versions still load"""
+    if raw[:1] == _CACHE_FORMAT_ZLIB_JSON:
+        return orjson.loads(zlib.decompress(raw[1:]))
+    return orjson.loads(raw)
+
+
+class _Counter:
+    """Thread-safe counter: next() on itertools.count is atomic under the GIL"""
+
+    def __init__(self):
+        self._increments = itertools.count()
+        self._reads = itertools.count()
+        self._read_lock = threading.Lock()
+
+    def increment(self):
+        next(self._increments)
+
+    @property
+    def value(self) -> int:
+        # Reading advances the counter too, so subtract the reads taken so far
+        with self._read_lock:
+            return next(self._increments) - next(self._reads)
+
+
+@dataclass(frozen=True)
+class PluginConfig:
+    """Plugin settings resolved once from the raw config dict"""
+
+    proxy_url: str = "http://localhost:8082"
+    api_key: Optional[str] = None
+    fallback_enabled: bool = True
+    pool_size: int = 32
+    health_ttl: float = 5
+    l1_max_mb: float = 32
+    l1_ttl: float = 60
+    cache_enabled: bool = True
+    cache_ttl: int = 3600
+    redis_url: str = "redis://localhost:6379/0"
+    intelligence_path: str = "intelligence"
+    blocked_domains: frozenset = frozenset()
+    allowed_domains: frozenset = frozenset()
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "PluginConfig":
+        caching = config.get("caching", {})
+        security = config.get("security") or {}
+        return cls(
+            proxy_url=config.get("proxy_url", cls.proxy_url),
+            api_key=config.get("api_key"),
+            fallback_enabled=config.get("fallback_enabled", True),
+            pool_size=config.get("pool_size", cls.pool_size),
+            health_ttl=config.get("health_ttl", cls.health_ttl),
+            l1_max_mb=config.get("l1_max_mb", cls.l1_max_mb),
+            l1_ttl=config.get("l1_ttl", cls.l1_ttl),
+            cache_enabled=bool(caching.get("enabled", True)),
+            cache_ttl=caching.get("ttl", cls.cache_ttl),
+            redis_url=caching.get("redis_url", cls.redis_url),
+            intelligence_path=config.get("intelligence", {}).get(
+                "storage_path", cls.intelligence_path
+            ),
+            blocked_domains=domain_set(security.get("blocked_domains")),
+            allowed_domains=domain_set(security.get("allowed_domains")),
+        )
+
+
 class OpenCodeWebFetchPlugin:
     """
     OpenCode Plugin for webfetch proxy integration.
@@ -41,28 +156,121 @@ class OpenCodeWebFetchPlugin:
     PLUGIN_NAME = "webfetch-proxy"
     PLUGIN_VERSION = "1.0.0"
 
+    __slots__ = (
+        "config_path",
+        "config",
+        "cfg",
+        "enabled",
+        "proxy_url",
+        "api_key",
+        "fallback_enabled",
+        "_proxy_fetch_url",
+        "_proxy_health_url",
+        "_proxy_headers",
+        "_requests",
+        "_cache_hits",
+        "blocked_requests",
+        "lock",
+        "_blocked_fh",
+        "_blocked_file",
+        "_blocked_writes",
+        "_blocked_log_lock",
+        "_original_webfetch",
+        "_proxy_session",
+        "_direct_session",
+        "_redis",
+        "_l1",
+        "_l1_lock",
+        "_inflight",
+        "_inflight_lock",
+        "_health_state",
+    )
+
     def __init__(self, config_path: str = None):
         """Initialize the OpenCode webfetch proxy plugin"""
         self.config_path = config_path or "./config.yaml"
         self.config = self._load_config()
 
+        # Settings and domain policy, resolved once instead of per request
+        self.cfg = PluginConfig.from_dict(self.config)
+
         # Plugin state
         self.enabled = False
         self.proxy_url = "http://localhost:8082"
         self.api_key = None
         self.fallback_enabled = True
+        self._prepare_proxy_requests()
 
         # Request tracking
-        self.request_count = 0
-        self.cache_hits = 0
-        self.blocked_requests = []
+        self._requests = _Counter()
+        self._cache_hits = _Counter()
+        self.blocked_requests = deque(maxlen=10000)
         self.lock = threading.Lock()
 
+        # Append-only blocked-request log, opened on first block
+        self._blocked_fh = None
+        self._blocked_writes = 0
+        self._blocked_log_lock = threading.Lock()
+
         # Original webfetch function reference
         self._original_webfetch = None
 
+        # Pooled HTTP sessions (proxy host and upstream sites)
+        self._proxy_session = self._make_session()
+        self._direct_session = self._make_session()
+
+        # Shared Redis client, created on first cache access
+        self._redis = None
+
+        # In-process L1 in front of Redis, bounded by content size
+        # (cachetools caches need a lock)
+        self._l1 = cachetools.TTLCache(
+            maxsize=int(self.cfg.l1_max_mb * 1024 * 1024),
+            ttl=self.cfg.l1_ttl,
+            getsizeof=lambda result: len(result.get("content") or "") or 1,
+        )
+        self._l1_lock = threading.Lock()
+
+        # Proxy fetches currently running, keyed by cache key (singleflight)
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Cached proxy health (see _is_proxy_available)
+        self._health_state = {"ok": False, "expires": 0.0, "consecutive_fail": 0}
+
         logger.info("OpenCode WebFetch Plugin initialized")
 
+    def _make_session(self) -> requests.Session:
+        """Create a keep-alive session with a bounded connection pool"""
+        pool_size = self.cfg.pool_size
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            # Once retries run out, hand back the last response (e.g. a real
+            # 503 and its body) rather than raising RetryError
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        """Release pooled connections and flush the blocked-request log"""
+        self._proxy_session.close()
+        self._direct_session.close()
+        if self._redis is not None:
+            self._redis.connection_pool.disconnect()
+        with self._blocked_log_lock:
+            if self._blocked_fh is not None:
+                self._blocked_fh.close()
+                self._blocked_fh = None
+
     def _load_config(self) -> Dict[str, Any]:
         """Load plugin configuration"""
         default_config = {
@@ -70,6 +278,10 @@ class OpenCodeWebFetchPlugin:
             "proxy_url": "http://localhost:8082",
             "api_key": None,
             "fallback_enabled": True,
+            "pool_size": 32,
+            "health_ttl": 5,
+            "l1_max_mb": 32,
+            "l1_ttl": 60,
             "intelligence": {
                 "enabled": True,
                 "storage_path": "intelligence",
@@ -83,15 +295,16 @@ class OpenCodeWebFetchPlugin:
             "security": {"blocked_domains": [], "allowed_domains": []},
         }
 
-        try:
-            if os.path.exists(self.config_path):
-                import yaml
+        if yaml is None:
+            return default_config
 
-                with open(self.config_path, "r") as f:
-                    config = yaml.safe_load(f) or default_config
-                return config
+        try:
+            with open(self.config_path, "r") as f:
+                return yaml.safe_load(f) or default_config
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.warning(f"Failed to load config: {e}")
+            logger.warning("Failed to load config: %s", e)
 
         return default_config
 
@@ -99,32 +312,42 @@ class OpenCodeWebFetchPlugin:
         """Enable the plugin and start intercepting webfetch operations"""
         try:
             self.enabled = True
-            self.proxy_url = self.config.get("proxy_url", "http://localhost:8082")
+            self.proxy_url = self.cfg.proxy_url
             # Use config API key or fall back to default "test-key"
-            self.api_key = self.config.get("api_key") or "test-key"
-            self.fallback_enabled = self.config.get("fallback_enabled", True)
+            self.api_key = self.cfg.api_key or "test-key"
+            self.fallback_enabled = self.cfg.fallback_enabled
+            self._prepare_proxy_requests()
 
             # Register as OpenCode plugin
             self._register_plugin()
 
             logger.info(
-                f"OpenCode WebFetch Plugin enabled with proxy: {self.proxy_url}"
+                "OpenCode WebFetch Plugin enabled with proxy: %s", self.proxy_url
             )
             return True
 
         except Exception as e:
-            logger.error(f"Failed to enable plugin: {e}")
+            logger.error("Failed to enable plugin: %s", e)
             return False
 
+    def _prepare_proxy_requests(self):
+        """Prebuild proxy endpoint URLs and headers for the current settings"""
+        self._proxy_fetch_url = f"{self.proxy_url}/fetch"
+        self._proxy_health_url = f"{self.proxy_url}/health"
+        self._proxy_headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            self._proxy_headers["Authorization"] = f"Bearer {self.api_key}"
+
     def disable(self) -> bool:
         """Disable the plugin and stop intercepting"""
         try:
             self.enabled = False
             self._unregister_plugin()
+            self.close()
             logger.info("OpenCode WebFetch Plugin disabled")
             return True
         except Exception as e:
-            logger.error(f"Failed to disable plugin: {e}")
+            logger.error("Failed to disable plugin: %s", e)
             return False
 
     def _register_plugin(self):
@@ -133,24 +356,20 @@ class OpenCodeWebFetchPlugin:
         if self._original_webfetch is None:
             try:
                 # Try to get OpenCode's webfetch function
-                import builtins
-
                 if hasattr(builtins, "webfetch"):
                     self._original_webfetch = builtins.webfetch
                     logger.info("Captured original webfetch function")
             except Exception as e:
-                logger.warning(f"Could not capture original webfetch: {e}")
+                logger.warning("Could not capture original webfetch: %s", e)
 
     def _unregister_plugin(self):
         """Unregister plugin from OpenCode system"""
         if self._original_webfetch is not None:
             try:
-                import builtins
-
                 builtins.webfetch = self._original_webfetch
                 logger.info("Restored original webfetch function")
             except Exception as e:
-                logger.warning(f"Could not restore original webfetch: {e}")
+                logger.warning("Could not restore original webfetch: %s", e)
 
     def webfetch(self, url: str, **kwargs) -> Dict[str, Any]:
         """
@@ -166,13 +385,12 @@ class OpenCodeWebFetchPlugin:
         if not self.enabled:
             return self._direct_fetch(url, **kwargs)
 
-        with self.lock:
-            self.request_count += 1
+        self._requests.increment()
 
         # Check if proxy is available
         if not self._is_proxy_available():
             if self.fallback_enabled:
-                logger.info(f"Proxy unavailable, using direct fetch for {url}")
+                logger.info("Proxy unavailable, using direct fetch for %s", url)
                 return self._direct_fetch(url, **kwargs)
             else:
                 return {
@@ -192,170 +410,283 @@ class OpenCodeWebFetchPlugin:
             }
 
         # Check cache
-        cache_key = self._generate_cache_key(url, kwargs)
-        cached_result = self._get_cached_result(cache_key)
-        if cached_result:
-            with self.lock:
-                self.cache_hits += 1
-            logger.info(f"Cache hit for {url}")
-            return cached_result
+        cache_key = None
+        if self.cfg.cache_enabled:
+            cache_key = self._generate_cache_key(url, kwargs)
+            cached_result = self._get_cached_result(cache_key)
+            if cached_result:
+                self._cache_hits.increment()
+                logger.info("Cache hit for %s", url)
+                return cached_result
 
         # Make request through proxy
-        return self._proxy_fetch(url, cache_key, **kwargs)
+        if cache_key is None:
+            return self._proxy_fetch(url, cache_key, **kwargs)
+        return self._singleflight(
+            cache_key, lambda: self._proxy_fetch(url, cache_key, **kwargs)
+        )
+
+    def _singleflight(
+        self, key: str, fetch: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Run fetch once per key; concurrent callers for the key share it"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = concurrent.futures.Future()
+
+        if not owner:
+            return dict(future.result())
+
+        try:
+            result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
 
     def _is_proxy_available(self) -> bool:
-        """Check if proxy server is available"""
+        """Check if proxy server is available (result cached for health_ttl)"""
+        now = time.monotonic()
+        if now < self._health_state["expires"]:
+            return self._health_state["ok"]
+
         try:
-            health_url = f"{self.proxy_url}/health"
-            response = requests.get(health_url, timeout=2)
-            return response.status_code == 200
+            response = self._proxy_session.get(self._proxy_health_url, timeout=2)
+            ok = response.status_code == 200
         except Exception as e:
-            logger.debug(f"Proxy health check failed: {e}")
-            return False
+            logger.debug("Proxy health check failed: %s", e)
+            ok = False
+
+        if ok:
+            self._mark_proxy_healthy(now)
+        else:
+            self._mark_proxy_unhealthy(now)
+        return ok
+
+    def _mark_proxy_healthy(self, now: float):
+        """Trust the proxy for the next health_ttl seconds"""
+        self._health_state["ok"] = True
+        self._health_state["consecutive_fail"] = 0
+        self._health_state["expires"] = now + self.cfg.health_ttl
+
+    def _mark_proxy_unhealthy(self, now: float):
+        """Skip the proxy, backing off exponentially on repeated failures"""
+        fails = self._health_state["consecutive_fail"] + 1
+        self._health_state["ok"] = False
+        self._health_state["consecutive_fail"] = fails
+        self._health_state["expires"] = now + min(60, 2**fails)
 
     def _is_domain_allowed(self, url: str) -> bool:
         """Check if domain is allowed by security policy"""
-        try:
-            from urllib.parse import urlparse
-
-            domain = urlparse(url).netloc.lower()
-
-            # Check blocked domains
-            blocked = self.config.get("security", {}).get("blocked_domains", [])
-            if any(b in domain for b in blocked):
-                return False
-
-            # Check allowed domains
-            allowed = self.config.get("security", {}).get("allowed_domains", [])
-            if allowed and not any(a in domain for a in allowed):
-                return False
-
+        if not (self.cfg.blocked_domains or self.cfg.allowed_domains):
             return True
+
+        try:
+            return is_domain_allowed(
+                urlparse(url).hostname or "",
+                self.cfg.blocked_domains,
+                self.cfg.allowed_domains,
+            )
         except Exception:
             return True  # Allow by default if check fails
 
     def _generate_cache_key(self, url: str, kwargs: Dict) -> str:
         """Generate cache key for request"""
-        import hashlib
+        h = hashlib.blake2b(url.encode(), digest_size=8)
+        for key, value in sorted(kwargs.items()):
+            h.update(f";{key}={value!r}".encode())
+        return h.hexdigest()
 
-        content = f"{url}:{str(sorted(kwargs.items()))}"
-        return hashlib.md5(content.encode()).hexdigest()[:16]
+    def _ensure_redis(self):
+        """Return the shared Redis client, creating its pool on first use"""
+        if self._redis is None:
+            if redis is None:
+                raise RuntimeError("redis package is not installed")
+
+            with self.lock:
+                if self._redis is None:
+                    self._redis = redis.Redis(
+                        connection_pool=redis.BlockingConnectionPool.from_url(
+                            self.cfg.redis_url,
+                            max_connections=16,
+                            socket_keepalive=True,
+                        )
+                    )
+        return self._redis
+
+    def _l1_put(self, cache_key: str, result: Dict[str, Any]):
+        """Store in L1 (caller holds _l1_lock) unless larger than the budget"""
+        try:
+            self._l1[cache_key] = result
+        except ValueError:
+            pass  # larger than the whole L1
 
     def _get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached result if available"""
-        if not self.config.get("caching", {}).get("enabled", True):
+        if not self.cfg.cache_enabled:
             return None
 
-        try:
-            import redis
+        with self._l1_lock:
+            hit = self._l1.get(cache_key)
+        if hit is not None:
+            return dict(hit)
 
-            redis_url = self.config.get("caching", {}).get(
-                "redis_url", "redis://localhost:6379/0"
-            )
-            r = redis.Redis.from_url(redis_url)
-            cached = r.get(f"webfetch:{cache_key}")
+        try:
+            cached = self._ensure_redis().get(f"webfetch:{cache_key}")
             if cached:
-                return json.loads(cached)
+                result = _unpack_cached(cached)
+                with self._l1_lock:
+                    self._l1_put(cache_key, result)
+                return dict(result)
         except Exception as e:
-            logger.debug(f"Cache lookup failed: {e}")
+            logger.debug("Cache lookup failed: %s", e)
 
         return None
 
-    def _cache_result(self, cache_key: str, result: Dict[str, Any], ttl: int = 3600):
-        """Cache the result"""
-        if not self.config.get("caching", {}).get("enabled", True):
-            return
+    def _get_cached_results_bulk(self, cache_keys: List[str]) -> List[Optional[Dict]]:
+        """Look up several cached results in one round-trip"""
+        if not self.cfg.cache_enabled:
+            return [None] * len(cache_keys)
+
+        with self._l1_lock:
+            results = [self._l1.get(k) for k in cache_keys]
+        results = [dict(r) if r is not None else None for r in results]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if not misses:
+            return results
 
+        # Only L1 misses go to Redis, in a single MGET
         try:
-            import redis
-            import json
+            cached = self._ensure_redis().mget(
+                [f"webfetch:{cache_keys[i]}" for i in misses]
+            )
+            with self._l1_lock:
+                for i, c in zip(misses, cached):
+                    if c:
+                        result = _unpack_cached(c)
+                        self._l1_put(cache_keys[i], result)
+                        results[i] = dict(result)
+        except Exception as e:
+            logger.debug("Bulk cache lookup failed: %s", e)
+
+        return results
 
-            redis_url = self.config.get("caching", {}).get(
-                "redis_url", "redis://localhost:6379/0"
+    def _cache_result(self, cache_key: str, result: Dict[str, Any], ttl: int = None):
+        """Cache the result (always written with an expiry)"""
+        if not self.cfg.cache_enabled:
+            return
+
+        ttl = ttl or self.cfg.cache_ttl
+        with self._l1_lock:
+            self._l1_put(cache_key, dict(result))
+        try:
+            self._ensure_redis().setex(
+                f"webfetch:{cache_key}", ttl, _pack_cached(result)
             )
-            r = redis.Redis.from_url(redis_url)
-            r.setex(f"webfetch:{cache_key}", ttl, json.dumps(result))
         except Exception as e:
-            logger.debug(f"Cache storage failed: {e}")
+            logger.debug("Cache storage failed: %s", e)
 
     def _log_blocked_request(self, url: str, kwargs: Dict, reason: str):
         """Log blocked request for intelligence"""
-        with self.lock:
-            self.blocked_requests.append(
-                {
-                    "timestamp": time.time(),
-                    "url": url,
-                    "reason": reason,
-                    "kwargs": kwargs,
-                }
-            )
-
-        # Log to file
+        self.blocked_requests.append(
+            {
+                "timestamp": time.time(),
+                "url": url,
+                "reason": reason,
+                "kwargs": kwargs,
+            }
+        )
+
+        # Log to file (JSON Lines, appended through a kept-open handle)
+        record = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "url": url,
+            "reason": reason,
+            "kwargs": kwargs,
+        }
         try:
-            intelligence_dir = Path(
-                self.config.get("intelligence", {}).get("storage_path", "intelligence")
+            line = orjson.dumps(
+                record, default=str, option=orjson.OPT_APPEND_NEWLINE
             )
-            blocked_file = intelligence_dir / "blocked_opencode_requests.json"
+            with self._blocked_log_lock:
+                if self._blocked_fh is None:
+                    self._open_blocked_log()
+                self._blocked_fh.write(line)
+                # Flush per record so it is visible to readers and survives a crash
+                self._blocked_fh.flush()
+                self._blocked_writes += 1
+
+                # Keep last 1000, trimmed once per 1000 appends
+                if self._blocked_writes >= 1000:
+                    self._trim_blocked_log()
+        except Exception as e:
+            logger.error("Failed to log blocked request: %s", e)
+
+    def _open_blocked_log(self):
+        """Open the blocked-request log for appending"""
+        intelligence_dir = Path(self.cfg.intelligence_path)
+        self._blocked_file = intelligence_dir / "blocked_opencode_requests.jsonl"
+        self._blocked_fh = open(self._blocked_file, "ab", buffering=64 * 1024)
+
+    def _trim_blocked_log(self):
+        """Rewrite the blocked-request log with only its newest 1000 lines"""
+        self._blocked_fh.close()
+        with open(self._blocked_file, "rb") as f:
+            tail = deque(f, maxlen=1000)
+
+        tmp_file = self._blocked_file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            f.writelines(tail)
+        os.replace(tmp_file, self._blocked_file)
+
+        self._blocked_fh = open(self._blocked_file, "ab", buffering=64 * 1024)
+        self._blocked_writes = 0
+
+    def _build_proxy_payload(self, url: str, kwargs: Dict) -> bytes:
+        """Serialize the proxy /fetch payload for a request"""
+        proxy_data = {
+            "url": url,
+            "method": kwargs.get("method", "GET"),
+            "timeout": kwargs.get("timeout", 30),
+        }
 
-            blocked_data = []
-            if blocked_file.exists():
-                with open(blocked_file, "r") as f:
-                    blocked_data = json.load(f)
+        # Add headers
+        if "headers" in kwargs:
+            proxy_data["headers"] = kwargs["headers"]
 
-            blocked_data.append(
-                {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "url": url,
-                    "reason": reason,
-                    "kwargs": kwargs,
-                }
-            )
-
-            # Keep last 1000
-            blocked_data = blocked_data[-1000:]
+        # Add data for POST
+        if "data" in kwargs:
+            proxy_data["data"] = kwargs["data"]
+        elif "json" in kwargs:
+            proxy_data["data"] = orjson.dumps(kwargs["json"]).decode()
 
-            with open(blocked_file, "w") as f:
-                json.dump(blocked_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to log blocked request: {e}")
+        # Only the per-request fields are encoded; drop their opening brace
+        # and splice them onto the constant prefix
+        return _PROXY_PAYLOAD_PREFIX + orjson.dumps(proxy_data)[1:]
 
-    def _proxy_fetch(self, url: str, cache_key: str, **kwargs) -> Dict[str, Any]:
+    def _proxy_fetch(
+        self, url: str, cache_key: Optional[str], **kwargs
+    ) -> Dict[str, Any]:
         """Fetch URL through proxy"""
         try:
-            # Prepare proxy request
-            proxy_data = {
-                "url": url,
-                "method": kwargs.get("method", "GET"),
-                "timeout": kwargs.get("timeout", 30),
-                "cache_enabled": True,
-                "intelligence_tags": ["opencode", "plugin"],
-            }
-
-            # Add headers
-            if "headers" in kwargs:
-                proxy_data["headers"] = kwargs["headers"]
-
-            # Add data for POST
-            if "data" in kwargs:
-                proxy_data["data"] = kwargs["data"]
-            elif "json" in kwargs:
-                proxy_data["data"] = json.dumps(kwargs["json"])
-
-            # Prepare headers
-            headers = {"Content-Type": "application/json"}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
+            payload = self._build_proxy_payload(url, kwargs)
 
             # Make proxy request
-            response = requests.post(
-                f"{self.proxy_url}/fetch",
-                json=proxy_data,
-                headers=headers,
+            response = self._proxy_session.post(
+                self._proxy_fetch_url,
+                data=payload,
+                headers=self._proxy_headers,
                 timeout=kwargs.get("timeout", 30) + 5,
             )
 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
 
                 # Cache successful response
                 if result.get("success"):
@@ -373,7 +704,11 @@ class OpenCodeWebFetchPlugin:
 
         except Exception as e:
             error_msg = f"Proxy fetch error: {str(e)}"
-            logger.warning(f"{error_msg} for {url}")
+            logger.warning("%s for %s", error_msg, url)
+            # Only an unreachable proxy is skipped; a bad or slow response
+            # must not route other requests around its blocklist
+            if isinstance(e, requests.ConnectionError):
+                self._mark_proxy_unhealthy(time.monotonic())
 
             if self.fallback_enabled:
                 return self._direct_fetch(url, **kwargs)
@@ -383,7 +718,7 @@ class OpenCodeWebFetchPlugin:
     def _direct_fetch(self, url: str, **kwargs) -> Dict[str, Any]:
         """Direct fetch without proxy"""
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
 
             # Prepare request
             timeout = kwargs.get("timeout", 30)
@@ -392,31 +727,42 @@ class OpenCodeWebFetchPlugin:
             data = kwargs.get("data")
             json_data = kwargs.get("json")
 
+            # Only forward options requests understands; the explicit
+            # arguments above must not be passed twice
+            passthru = {k: v for k, v in kwargs.items() if k in _REQUESTS_PASSTHROUGH}
+
             # Make direct request
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, timeout=timeout, **kwargs)
+            response = self._direct_session.request(
+                method,
+                url,
+                data=data,
+                json=json_data,
+                headers=headers,
+                timeout=timeout,
+                **passthru,
+            )
+
+            # Decode with the declared charset rather than response.text,
+            # which falls back to charset sniffing; raw_bytes skips decoding
+            if kwargs.get("raw_bytes"):
+                content = response.content
             else:
-                if json_data:
-                    response = requests.post(
-                        url, json=json_data, headers=headers, timeout=timeout, **kwargs
-                    )
-                else:
-                    response = requests.request(
-                        method,
-                        url,
-                        data=data,
-                        headers=headers,
-                        timeout=timeout,
-                        **kwargs,
-                    )
+                encoding = (
+                    requests.utils.get_encoding_from_headers(response.headers)
+                    or "utf-8"
+                )
+                try:
+                    content = response.content.decode(encoding, errors="replace")
+                except LookupError:
+                    content = response.content.decode("utf-8", errors="replace")
 
             result = {
                 "success": response.status_code < 400,
                 "status_code": response.status_code,
-                "content": response.text,
+                "content": content,
                 "headers": dict(response.headers),
                 "url": url,
-                "execution_time": time.time() - start_time,
+                "execution_time": time.perf_counter() - start_time,
                 "cached": False,
                 "direct": True,
             }
@@ -426,59 +772,159 @@ class OpenCodeWebFetchPlugin:
         except Exception as e:
             return {"success": False, "error": str(e), "url": url, "direct": True}
 
+    async def _async_proxy_fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        cache_key: Optional[str],
+        kwargs: Dict,
+    ) -> Dict[str, Any]:
+        """Fetch URL through proxy without blocking the event loop"""
+        payload = self._build_proxy_payload(url, kwargs)
+        try:
+            async with session.post(
+                self._proxy_fetch_url,
+                data=payload,
+                headers=self._proxy_headers,
+                timeout=aiohttp.ClientTimeout(total=kwargs.get("timeout", 30) + 5),
+            ) as response:
+                if response.status == 200:
+                    result = orjson.loads(await response.read())
+
+                    # Cache successful response
+                    if result.get("success"):
+                        self._cache_result(cache_key, result)
+
+                    return result
+
+                error_msg = f"Proxy request failed: {response.status}"
+                logger.warning(error_msg)
+        except Exception as e:
+            error_msg = f"Proxy fetch error: {str(e)}"
+            logger.warning("%s for %s", error_msg, url)
+            if isinstance(e, aiohttp.ClientConnectionError):
+                self._mark_proxy_unhealthy(time.monotonic())
+
+        if self.fallback_enabled:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(self._direct_fetch, url, **kwargs)
+            )
+        return {"success": False, "error": error_msg, "url": url}
+
+    async def _bulk_fetch_one(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        cache_key: Optional[str],
+        cached_result: Optional[Dict[str, Any]],
+        kwargs: Dict,
+        inflight: Dict[str, asyncio.Task],
+    ) -> Dict[str, Any]:
+        """Single bulk item: same checks as webfetch, async proxy request"""
+        self._requests.increment()
+
+        if not self._is_domain_allowed(url):
+            self._log_blocked_request(url, kwargs, "Domain not allowed")
+            return {
+                "success": False,
+                "error": "Domain blocked by security policy",
+                "url": url,
+                "blocked": True,
+            }
+
+        if cached_result:
+            self._cache_hits.increment()
+            logger.info("Cache hit for %s", url)
+            return cached_result
+
+        if cache_key is None:
+            return await self._async_proxy_fetch(session, url, cache_key, kwargs)
+
+        # Duplicate URLs in one batch share a single proxy request
+        task = inflight.get(cache_key)
+        if task is None:
+            task = inflight[cache_key] = asyncio.ensure_future(
+                self._async_proxy_fetch(session, url, cache_key, kwargs)
+            )
+        return dict(await task)
+
     def bulk_webfetch(self, urls: List[str], **kwargs) -> List[Dict[str, Any]]:
         """Bulk webfetch through proxy"""
-        results = []
-        concurrent_limit = kwargs.get("concurrent_limit", 3)
+        concurrent_limit = kwargs.pop("concurrent_limit", 3)
 
-        import asyncio
+        # Without a reachable proxy there is nothing to pipeline
+        if not self.enabled or not self._is_proxy_available():
+            return self._bulk_webfetch_threaded(urls, concurrent_limit, kwargs)
 
-        async def fetch_url(url: str) -> Dict[str, Any]:
-            return self.webfetch(url, **kwargs)
+        # Resolve all cache lookups in a single MGET before dispatching misses
+        if self.cfg.cache_enabled:
+            cache_keys = [self._generate_cache_key(url, kwargs) for url in urls]
+        else:
+            cache_keys = [None] * len(urls)
+        cached_results = self._get_cached_results_bulk(cache_keys)
 
-        # Process URLs with semaphore for concurrency control
+        # One pooled aiohttp session; the connector limit bounds concurrency
         async def process_urls():
-            semaphore = asyncio.Semaphore(concurrent_limit)
-
-            async def fetch_with_limit(url: str):
-                async with semaphore:
-                    return await fetch_url(url)
-
-            tasks = [fetch_with_limit(url) for url in urls]
-            return await asyncio.gather(*tasks)
+            connector = aiohttp.TCPConnector(
+                limit=concurrent_limit, keepalive_timeout=30
+            )
+            inflight = {}
+            async with aiohttp.ClientSession(connector=connector) as session:
+                return await asyncio.gather(
+                    *(
+                        self._bulk_fetch_one(
+                            session, url, key, cached, kwargs, inflight
+                        )
+                        for url, key, cached in zip(urls, cache_keys, cached_results)
+                    )
+                )
 
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = loop.run_until_complete(process_urls())
-            loop.close()
+            return asyncio.run(process_urls())
         except Exception as e:
-            logger.error(f"Bulk fetch error: {e}")
-            # Fallback to sequential
-            for url in urls:
-                results.append(self.webfetch(url, **kwargs))
-
-        return results
+            logger.error("Bulk fetch error: %s", e)
+            return self._bulk_webfetch_threaded(urls, concurrent_limit, kwargs)
+
+    def _bulk_webfetch_threaded(
+        self, urls: List[str], concurrent_limit: int, kwargs: Dict
+    ) -> List[Dict[str, Any]]:
+        """Fallback bulk path: blocking webfetch calls on a bounded thread pool"""
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, concurrent_limit)
+        ) as executor:
+            return list(executor.map(lambda url: self.webfetch(url, **kwargs), urls))
+
+    @property
+    def request_count(self) -> int:
+        return self._requests.value
+
+    @property
+    def cache_hits(self) -> int:
+        return self._cache_hits.value
 
     def get_status(self) -> Dict[str, Any]:
         """Get plugin status"""
+        request_count = self.request_count
+        cache_hits = self.cache_hits
         return {
             "plugin": self.PLUGIN_NAME,
             "version": self.PLUGIN_VERSION,
             "enabled": self.enabled,
             "proxy_url": self.proxy_url,
-            "request_count": self.request_count,
-            "cache_hits": self.cache_hits,
+            "request_count": request_count,
+            "cache_hits": cache_hits,
             "fallback_enabled": self.fallback_enabled,
-            "cache_hit_rate": (self.cache_hits / self.request_count * 100)
-            if self.request_count > 0
+            "cache_hit_rate": (cache_hits / request_count * 100)
+            if request_count > 0
             else 0,
         }
 
     def get_blocked_requests(self, limit: int = 50) -> List[Dict]:
         """Get blocked requests"""
-        with self.lock:
-            return self.blocked_requests[-limit:]
+        if limit <= 0:
+            return list(self.blocked_requests)
+        return list(itertools.islice(reversed(self.blocked_requests), limit))[::-1]
 
 
 # Global plugin instance
@@ -494,8 +940,10 @@ def get_plugin() -> OpenCodeWebFetchPlugin:
 
 
 def initialize_plugin(config_path: str = None) -> bool:
-    """Initialize the OpenCode webfetch proxy plugin"""
+    """Initialize the OpenCode webfetch proxy plugin (no-op if already enabled)"""
     plugin = get_plugin()
+    if plugin.enabled:
+        return True
     return plugin.enable()
 
 
@@ -42,6 +42,9 @@ setup(
         "pydantic>=2.5.0",
         "certifi>=2024.2.2",
         "aiofiles>=23.2.1",
+        "aiosqlite>=0.19.0",
+        "orjson>=3.9.10",
+        "cachetools>=5.3.2",
     ],
     extras_require={
         "dev": [
@@ -16,9 +16,9 @@ else
     echo "⚠️  Redis is not running. Starting Redis server..."
     # Try to start Redis (platform dependent)
     if [[ "$OSTYPE" == "darwin"* ]]; then
-        brew services start redis 2>/dev/null || redis-server --daemonize yes
+        brew services start redis 2>/dev/null || redis-server --daemonize yes --maxmemory-policy allkeys-lru
     elif [[ "$OSTYPE" == "linux-gnu"* ]]; then
-        sudo systemctl start redis 2>/dev/null || redis-server --daemonize yes
+        sudo systemctl start redis 2>/dev/null || redis-server --daemonize yes --maxmemory-policy allkeys-lru
     else
         echo "❓ Cannot start Redis automatically on this platform"
         echo "   Please start Redis manually: redis-server --daemonize yes"
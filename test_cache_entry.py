@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Redis cache entry format and chunking
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from webfetch_proxy import (
+    ProxyResponse,
+    ShadowWebfetchProxy,
+    _chunk_keys,
+    _decode_cache_entry,
+    _encode_cache_entry,
+)
+
+
+def _response(content="<html>hello</html>", **fields):
+    values = dict(
+        status_code=200,
+        content=content,
+        headers={"Content-Type": "text/html"},
+        url="https://example.com/",
+        final_url="https://example.com/",
+        execution_time=0.25,
+        size=len(content),
+        success=True,
+    )
+    values.update(fields)
+    return ProxyResponse(**values)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+
+    async def execute(self):
+        for key, value in self.ops:
+            self.redis.data[key] = value
+
+
+class _FakeRedis:
+    """Just the calls the cache code makes, backed by a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+def _proxy(chunk_size=16):
+    proxy = ShadowWebfetchProxy.__new__(ShadowWebfetchProxy)
+    proxy.config = SimpleNamespace(cache_ttl=60, cache_chunk_size=chunk_size)
+    proxy.redis_client = _FakeRedis()
+    proxy._local_cache = {}
+    return proxy
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "plain text",
+        "line one\nline two\n",
+        '{"json": "body with \\"quotes\\""}',
+        "unicode: café ☃ \U0001f525",
+        "lone surrogate: \ud800 end",
+    ],
+)
+def test_entry_round_trip(content):
+    response = _response(content, content_encoding=None)
+    assert _decode_cache_entry(_encode_cache_entry(response)) == response
+
+
+def test_base64_entry_round_trip():
+    response = _response("aGVsbG8=", content_encoding="base64")
+    assert _decode_cache_entry(_encode_cache_entry(response)) == response
+
+
+def test_legacy_all_json_entry():
+    response = _response("legacy\nbody")
+    legacy = orjson.dumps(response.to_dict())
+    assert b"\n" not in legacy
+    assert _decode_cache_entry(legacy) == response
+
+
+def test_chunk_keys_with_nonce():
+    assert _chunk_keys("proxy_cache:k", b"ab12:3") == [
+        "proxy_cache:k:ab12:chunk:0",
+        "proxy_cache:k:ab12:chunk:1",
+        "proxy_cache:k:ab12:chunk:2",
+    ]
+
+
+def test_chunk_keys_without_nonce():
+    assert _chunk_keys("proxy_cache:k", b"2") == [
+        "proxy_cache:k:chunk:0",
+        "proxy_cache:k:chunk:1",
+    ]
+
+
+def test_chunked_write_and_read():
+    proxy = _proxy()
+    response = _response("x" * 200)
+    asyncio.run(proxy._cache_response("k", response))
+
+    manifest = proxy.redis_client.data["proxy_cache:k"]
+    assert manifest.startswith(ShadowWebfetchProxy.CACHE_MANIFEST_PREFIX)
+    assert len(proxy.redis_client.data) > 2
+    assert asyncio.run(proxy._get_cached_response("k", manifest)) == response
+
+
+def test_concurrent_writes_keep_their_own_chunks():
+    proxy = _proxy()
+    first, second = _response("a" * 200), _response("b" * 300)
+    asyncio.run(proxy._cache_response("k", first))
+    first_manifest = proxy.redis_client.data["proxy_cache:k"]
+    asyncio.run(proxy._cache_response("k", second))
+    second_manifest = proxy.redis_client.data["proxy_cache:k"]
+
+    assert first_manifest != second_manifest
+    assert asyncio.run(proxy._get_cached_response("k", first_manifest)) == first
+    assert asyncio.run(proxy._get_cached_response("k", second_manifest)) == second
+
+
+def test_legacy_manifest_read():
+    proxy = _proxy()
+    payload = _encode_cache_entry(_response("y" * 40))
+    proxy.redis_client.data.update(
+        {
+            "proxy_cache:k:chunk:0": payload[:30],
+            "proxy_cache:k:chunk:1": payload[30:],
+        }
+    )
+    cached = asyncio.run(proxy._get_cached_response("k", b"chunks:2"))
+    assert cached == _response("y" * 40)
+
+
+def test_missing_chunk_is_a_miss():
+    proxy = _proxy()
+    asyncio.run(proxy._cache_response("k", _response("z" * 200)))
+    manifest = proxy.redis_client.data["proxy_cache:k"]
+    chunk_key = next(k for k in proxy.redis_client.data if ":chunk:" in k)
+    del proxy.redis_client.data[chunk_key]
+
+    assert asyncio.run(proxy._get_cached_response("k", manifest)) is None
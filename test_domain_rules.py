@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the domain policy shared by the proxy and the plugin
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from domain_rules import domain_set, is_domain_allowed
+from opencode_plugin import OpenCodeWebFetchPlugin, PluginConfig
+
+
+def _is_allowed(url, blocked=(), allowed=()):
+    security = {"blocked_domains": list(blocked), "allowed_domains": list(allowed)}
+    cfg = PluginConfig.from_dict({"security": security})
+    return OpenCodeWebFetchPlugin._is_domain_allowed(SimpleNamespace(cfg=cfg), url)
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("http://evil.com/", False),
+        ("http://EVIL.com/", False),
+        ("http://sub.evil.com/", False),
+        ("http://evil.com./", False),
+        ("http://sub.evil.com./path", False),
+        ("http://localhost.:8082/", False),
+        ("http://notevil.com/", True),
+        ("http://evil.com.example.org/", True),
+        ("http://example.org/", True),
+    ],
+)
+def test_blocked_domains(url, expected):
+    assert _is_allowed(url, blocked=["evil.com", "localhost"]) is expected
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://example.com/", True),
+        ("https://example.com./", True),
+        ("https://docs.example.com/", True),
+        ("https://notexample.com/", False),
+        ("https://example.com.attacker.net/", False),
+    ],
+)
+def test_allowed_domains(url, expected):
+    assert _is_allowed(url, allowed=["example.com"]) is expected
+
+
+def test_trailing_dot_in_config_entry():
+    assert _is_allowed("http://evil.com/", blocked=["evil.com."]) is False
+
+
+@pytest.mark.parametrize(
+    "host,expected",
+    [
+        ("localhost", False),
+        ("localhost.", False),
+        ("127.0.0.1", False),
+        ("api.localhost", False),
+        ("mylocalhost.com", True),
+        ("127.0.0.10", True),
+    ],
+)
+def test_shared_matcher_blocked(host, expected):
+    blocked = domain_set(["localhost", "127.0.0.1"])
+    assert is_domain_allowed(host, blocked, frozenset()) is expected
+
+
+def test_shared_matcher_null_lists():
+    assert domain_set(None) == frozenset()
+    assert is_domain_allowed("example.com", domain_set(None), domain_set(None))
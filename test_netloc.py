@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the proxy's URL host extraction
+"""
+
+from urllib.parse import urlsplit
+
+import pytest
+
+from webfetch_proxy import _netloc
+
+CASES = [
+    ("https://Example.COM/path", "example.com"),
+    ("https://example.com:8443/path", "example.com"),
+    ("https://example.com?q=1", "example.com"),
+    ("https://example.com#frag", "example.com"),
+    ("https://user:pw@example.com:80/", "example.com"),
+    ("https://good.com@evil.com/", "evil.com"),
+    ("https://[::1]:8080/", "::1"),
+    ("https://[2001:DB8::1]/", "2001:db8::1"),
+    # urlsplit (and so aiohttp) drops tab/CR/LF, so the host must too
+    ("http://evil.co\tm/", "evil.com"),
+    ("http://evil.co\nm/", "evil.com"),
+    ("http://local\r\nhost/", "localhost"),
+    ("http://127.0.0\t.1:8082/", "127.0.0.1"),
+    ("example.com/path", ""),
+]
+
+
+@pytest.mark.parametrize("url,host", CASES)
+def test_netloc(url, host):
+    assert _netloc(url) == host
+
+
+@pytest.mark.parametrize("url,host", CASES)
+def test_netloc_matches_urlsplit(url, host):
+    stripped = url.replace("\t", "").replace("\r", "").replace("\n", "")
+    assert _netloc(url) == (urlsplit(stripped).hostname or "")
@@ -9,127 +9,186 @@ import os
 import json
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 # Add current directory to path
 if "." not in sys.path:
     sys.path.insert(0, ".")
 
-print("🔥 WebFetch Proxy Plugin Test")
-print("=" * 50)
+# One pooled session for every step so the proxy connection is reused
+session = requests.Session()
+session.mount(
+    "http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=10)
+)
+
 
 # Test 1: Check if proxy is running
-print("\n[1] Checking proxy health...")
-try:
-    response = requests.get("http://localhost:8082/health", timeout=5)
-    if response.status_code == 200:
-        health = response.json()
-        print(f"   ✅ Proxy is healthy")
-        print(f"   Status: {health.get('status')}")
-        print(f"   Cache: {health.get('components', {}).get('cache')}")
-    else:
-        print(f"   ⚠️  Proxy returned status {response.status_code}")
-except requests.exceptions.ConnectionError:
-    print("   ❌ Proxy not running - start it with: python3 webfetch_proxy.py")
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+def check_health():
+    lines = []
+    try:
+        response = session.get("http://localhost:8082/health", timeout=5)
+        if response.status_code == 200:
+            health = response.json()
+            lines.append(f"   ✅ Proxy is healthy")
+            lines.append(f"   Status: {health.get('status')}")
+            lines.append(f"   Cache: {health.get('components', {}).get('cache')}")
+        else:
+            lines.append(f"   ⚠️  Proxy returned status {response.status_code}")
+    except requests.exceptions.ConnectionError:
+        lines.append(
+            "   ❌ Proxy not running - start it with: python3 webfetch_proxy.py"
+        )
+    except Exception as e:
+        lines.append(f"   ❌ Error: {e}")
+    return lines
+
 
 # Test 2: Test single fetch through proxy
-print("\n[2] Testing single fetch through proxy...")
-try:
-    proxy_data = {
-        "url": "https://httpbin.org/get",
-        "method": "GET",
-        "timeout": 30,
-        "cache_enabled": True,
-        "intelligence_tags": ["test", "plugin"],
-    }
-
-    headers = {"Content-Type": "application/json", "Authorization": "Bearer test-key"}
-
-    response = requests.post(
-        "http://localhost:8082/fetch", json=proxy_data, headers=headers, timeout=35
-    )
-
-    if response.status_code == 200:
-        result = response.json()
-        print(f"   ✅ Fetch successful")
-        print(f"   Status: {result.get('status_code')}")
-        print(f"   Cached: {result.get('cached', False)}")
-        print(f"   Time: {result.get('execution_time', 0):.3f}s")
-    else:
-        print(f"   ❌ Fetch failed: {response.status_code}")
-        print(f"   Response: {response.text[:200]}")
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+def check_single_fetch():
+    lines = []
+    try:
+        proxy_data = {
+            "url": "https://httpbin.org/get",
+            "method": "GET",
+            "timeout": 30,
+            "cache_enabled": True,
+            "intelligence_tags": ["test", "plugin"],
+        }
+
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer test-key",
+        }
+
+        response = session.post(
+            "http://localhost:8082/fetch", json=proxy_data, headers=headers, timeout=35
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            lines.append(f"   ✅ Fetch successful")
+            lines.append(f"   Status: {result.get('status_code')}")
+            lines.append(f"   Cached: {result.get('cached', False)}")
+            lines.append(f"   Time: {result.get('execution_time', 0):.3f}s")
+        else:
+            lines.append(f"   ❌ Fetch failed: {response.status_code}")
+            lines.append(f"   Response: {response.text[:200]}")
+    except Exception as e:
+        lines.append(f"   ❌ Error: {e}")
+    return lines
+
 
 # Test 3: Test bulk fetch
-print("\n[3] Testing bulk fetch through proxy...")
-try:
-    bulk_data = {
-        "urls": [
-            "https://httpbin.org/get",
-            "https://httpbin.org/json",
-            "https://httpbin.org/html",
-        ],
-        "concurrent_limit": 3,
-        "intelligence_tags": ["test", "bulk"],
-    }
-
-    headers = {"Content-Type": "application/json", "Authorization": "Bearer test-key"}
-
-    response = requests.post(
-        "http://localhost:8082/fetch/bulk", json=bulk_data, headers=headers, timeout=45
-    )
-
-    if response.status_code == 200:
-        result = response.json()
-        successful = result.get("successful", 0)
-        total = result.get("total_urls", 0)
-        print(f"   ✅ Bulk fetch complete")
-        print(f"   Successful: {successful}/{total}")
-    else:
-        print(f"   ❌ Bulk fetch failed: {response.status_code}")
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+def check_bulk_fetch():
+    lines = []
+    try:
+        bulk_data = {
+            "urls": [
+                "https://httpbin.org/get",
+                "https://httpbin.org/json",
+                "https://httpbin.org/html",
+            ],
+            "concurrent_limit": 3,
+            "intelligence_tags": ["test", "bulk"],
+        }
+
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer test-key",
+        }
+
+        response = session.post(
+            "http://localhost:8082/fetch/bulk",
+            json=bulk_data,
+            headers=headers,
+            timeout=45,
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            successful = result.get("successful", 0)
+            total = result.get("total_urls", 0)
+            lines.append(f"   ✅ Bulk fetch complete")
+            lines.append(f"   Successful: {successful}/{total}")
+        else:
+            lines.append(f"   ❌ Bulk fetch failed: {response.status_code}")
+    except Exception as e:
+        lines.append(f"   ❌ Error: {e}")
+    return lines
+
 
 # Test 4: Check blocked requests
-print("\n[4] Checking blocked requests...")
-try:
-    response = requests.get("http://localhost:8082/blocked/requests", timeout=5)
-    if response.status_code == 200:
-        result = response.json()
-        blocked = result.get("blocked_requests", [])
-        print(f"   ✅ Blocked requests retrieved")
-        print(f"   Total blocked: {result.get('total', 0)}")
-    else:
-        print(f"   ⚠️  Could not retrieve blocked requests")
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+def check_blocked_requests():
+    lines = []
+    try:
+        response = session.get("http://localhost:8082/blocked/requests", timeout=5)
+        if response.status_code == 200:
+            result = response.json()
+            lines.append(f"   ✅ Blocked requests retrieved")
+            lines.append(f"   Total blocked: {result.get('total', 0)}")
+        else:
+            lines.append(f"   ⚠️  Could not retrieve blocked requests")
+    except Exception as e:
+        lines.append(f"   ❌ Error: {e}")
+    return lines
+
 
 # Test 5: Check intelligence records
-print("\n[5] Checking intelligence records...")
-try:
-    response = requests.get(
-        "http://localhost:8082/intelligence/list?limit=5", timeout=5
-    )
-    if response.status_code == 200:
-        result = response.json()
-        records = result.get("records", [])
-        print(f"   ✅ Intelligence records retrieved")
-        print(f"   Total records: {result.get('total_records', 0)}")
-    else:
-        print(f"   ⚠️  Could not retrieve intelligence records")
-except Exception as e:
-    print(f"   ❌ Error: {e}")
+def check_intelligence():
+    lines = []
+    try:
+        response = session.get(
+            "http://localhost:8082/intelligence/list?limit=5", timeout=5
+        )
+        if response.status_code == 200:
+            result = response.json()
+            lines.append(f"   ✅ Intelligence records retrieved")
+            lines.append(f"   Total records: {result.get('total_records', 0)}")
+        else:
+            lines.append(f"   ⚠️  Could not retrieve intelligence records")
+    except Exception as e:
+        lines.append(f"   ❌ Error: {e}")
+    return lines
+
+
+# Stages run in order: the health check, then the fetches, then the checks
+# that read state the fetches create. Steps within a stage run concurrently.
+STAGES = [
+    [("[1] Checking proxy health...", check_health)],
+    [
+        ("[2] Testing single fetch through proxy...", check_single_fetch),
+        ("[3] Testing bulk fetch through proxy...", check_bulk_fetch),
+    ],
+    [
+        ("[4] Checking blocked requests...", check_blocked_requests),
+        ("[5] Checking intelligence records...", check_intelligence),
+    ],
+]
+
+SUMMARY = """
+📊 Summary:
+   - Proxy server: http://localhost:8082
+   - Health check: http://localhost:8082/health
+   - Single fetch: POST /fetch
+   - Bulk fetch: POST /fetch/bulk
+   - Blocked: GET /blocked/requests
+   - Intelligence: GET /intelligence/list"""
+
+print("🔥 WebFetch Proxy Plugin Test")
+print("=" * 50)
+
+with ThreadPoolExecutor(max_workers=max(map(len, STAGES))) as executor:
+    for stage in STAGES:
+        futures = [executor.submit(step) for _, step in stage]
+        for (title, _), future in zip(stage, futures):
+            print(f"\n{title}")
+            for line in future.result():
+                print(line)
+
+session.close()
 
 print("\n" + "=" * 50)
 print("✅ Plugin test completed")
 
 # Summary
-print("\n📊 Summary:")
-print("   - Proxy server: http://localhost:8082")
-print("   - Health check: http://localhost:8082/health")
-print("   - Single fetch: POST /fetch")
-print("   - Bulk fetch: POST /fetch/bulk")
-print("   - Blocked: GET /blocked/requests")
-print("   - Intelligence: GET /intelligence/list")
+print(SUMMARY)
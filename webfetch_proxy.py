@@ -5,21 +5,33 @@ Advanced webfetch proxy for opencode operations
 """
 
 import asyncio
+import base64
 import aiohttp
 import json
 import time
 import logging
+import logging.handlers
+import queue
+import atexit
+import copy
 import hashlib
+import heapq
 import os
+import random
 import re
-from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass, asdict
+import signal
+import socket
+import subprocess
+import sys
+from typing import Dict, Any, List, Optional, Tuple, Union
+from dataclasses import dataclass, replace
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 import uvicorn
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
@@ -29,19 +41,97 @@ from datetime import datetime
 import ssl
 import certifi
 import aiofiles
+import aiosqlite
+import cachetools
+import orjson
+from yarl import URL
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("/tmp/shadow-webfetch-proxy.log"),
-        logging.StreamHandler(),
-    ],
+from domain_rules import domain_set, is_domain_allowed
+
+# Configure logging: file/console writes happen on a listener thread so
+# request handlers only enqueue records
+_log_formatter = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+_log_handlers = [
+    logging.FileHandler("/tmp/shadow-webfetch-proxy.log"),
+    logging.StreamHandler(),
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records unformatted; the listener thread formats them"""
+
+    def prepare(self, record):
+        # The queue is in-process, so the record needs no pickling-safe copy
+        return record
+
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = _DeferredQueueHandler(_log_queue)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, *_log_handlers, respect_handler_level=True
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger("ShadowWebfetchProxy")
 
 
+class _RequestBanner:
+    """Styled request display, rendered only when the log record is written"""
+
+    __slots__ = (
+        "created",
+        "request_id",
+        "method",
+        "url",
+        "status",
+        "time_ms",
+        "size",
+        "cached",
+        "api_key",
+    )
+
+    def __init__(self, request_id, method, url, status, time_ms, size, cached, api_key):
+        self.created = time.time()
+        self.request_id = request_id
+        self.method = method
+        self.url = url
+        self.status = status
+        self.time_ms = time_ms
+        self.size = size
+        self.cached = cached
+        self.api_key = api_key
+
+    def __str__(self) -> str:
+        border = "=" * 50
+        api_key = self.api_key
+        masked_key = f"***{api_key[-4:]}" if api_key and len(api_key) > 4 else "None"
+
+        if self.status == "PENDING":
+            timestamp = datetime.fromtimestamp(self.created).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            return f"""
+🔄 PROXY REQUEST {self.request_id}
+{border}
+📡 Method: {self.method}
+🎯 Target: {self.url}
+🔑 API Key: {masked_key}
+🕐 Time: {timestamp}
+{border}
+"""
+        cache_icon = "💨 CACHE HIT" if self.cached else "🌐 FETCH"
+        return f"""
+✅ COMPLETED {self.request_id} | {self.status} | ⏱️ {self.time_ms}ms | 📦 {self.size:,}B | {cache_icon}
+{border}
+"""
+
+
 def display_request(
     request_id: str,
     method: str,
@@ -53,36 +143,72 @@ def display_request(
     api_key: str = None,
 ):
     """Display proxy request in styled console format"""
-    border = "=" * 50
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    masked_key = f"***{api_key[-4:]}" if api_key and len(api_key) > 4 else "None"
+    # Only the raw fields are captured here; the listener thread formats them
+    logger.info(
+        "%s",
+        _RequestBanner(
+            request_id, method, url, status, time_ms, size, cached, api_key
+        ),
+    )
 
-    if status == "PENDING":
-        output = f"""
-🔄 PROXY REQUEST {request_id}
-{border}
-📡 Method: {method}
-🎯 Target: {url}
-🔑 API Key: {masked_key}
-🕐 Time: {timestamp}
-{border}
-"""
-    else:
-        cache_icon = "💨 CACHE HIT" if cached else "🌐 FETCH"
-        output = f"""
-✅ COMPLETED {request_id} | {status} | ⏱️ {time_ms}ms | 📦 {size:,}B | {cache_icon}
-{"=" * 50}
-"""
 
-    # Use logger for output (shows in uvicorn logs)
-    logger.info(output)
+def _netloc(url: str) -> str:
+    """Extract the lowercase host of a URL with plain string scanning.
+
+    Falls back to urlparse for IPv6 literals and scheme-less URLs.
+    """
+    if "\t" in url or "\r" in url or "\n" in url:
+        # urlsplit (and so yarl/aiohttp) drops these before parsing
+        url = url.replace("\t", "").replace("\r", "").replace("\n", "")
+
+    i = url.find("://")
+    if i < 0:
+        return (urlparse(url).hostname or "").lower()
+
+    start = i + 3
+    end = len(url)
+    for sep in "/?#":
+        j = url.find(sep, start)
+        if j != -1 and j < end:
+            end = j
+
+    host = url[start:end].rpartition("@")[2]
+    if host.startswith("["):
+        return (urlparse(url).hostname or "").lower()
+    return host.split(":", 1)[0].lower()
+
+
+def _trim_jsonl(path: Path, keep: int):
+    """Rewrite a JSON lines file with only its last `keep` lines"""
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    if len(lines) <= keep:
+        return
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.writelines(lines[-keep:])
+    os.replace(tmp_path, path)
 
 
 # Security scheme
 security = HTTPBearer()
 
+# Content types returned base64-encoded rather than decoded as text
+BINARY_CONTENT_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "application/octet-stream",
+    "application/pdf",
+    "application/zip",
+)
 
-@dataclass
+# Slotted dataclasses (no per-instance __dict__) where Python supports them
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class ProxyRequest:
     """Represents a proxy request"""
 
@@ -96,9 +222,12 @@ class ProxyRequest:
     user_agent: Optional[str] = None
     cookies: Optional[Dict[str, str]] = None
     allow_status_codes: Optional[List[int]] = None
+    cache_enabled: bool = True
+    intelligence_tags: Optional[List[str]] = None
+    return_raw: bool = False
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ProxyResponse:
     """Represents a proxy response"""
 
@@ -111,6 +240,49 @@ class ProxyResponse:
     size: int
     success: bool
     error: Optional[str] = None
+    content_encoding: Optional[str] = None  # "base64" for raw bodies
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of the fields (cheaper than dataclasses.asdict)"""
+        return {
+            "status_code": self.status_code,
+            "content": self.content,
+            "headers": self.headers,
+            "url": self.url,
+            "final_url": self.final_url,
+            "execution_time": self.execution_time,
+            "size": self.size,
+            "success": self.success,
+            "error": self.error,
+            "content_encoding": self.content_encoding,
+        }
+
+
+def _encode_cache_entry(response: ProxyResponse) -> bytes:
+    """Serialize a response as JSON metadata, a newline, then the raw body.
+
+    The body is stored as plain UTF-8 so it is never JSON-escaped.
+    """
+    meta = response.to_dict()
+    body = meta.pop("content").encode("utf-8", "surrogatepass")
+    return orjson.dumps(meta) + b"\n" + body
+
+
+def _decode_cache_entry(data: bytes) -> ProxyResponse:
+    """Inverse of _encode_cache_entry; also reads older all-JSON entries"""
+    meta, sep, body = data.partition(b"\n")
+    if not sep:
+        return ProxyResponse(**orjson.loads(data))
+    return ProxyResponse(
+        content=body.decode("utf-8", "surrogatepass"), **orjson.loads(meta)
+    )
+
+
+def _chunk_keys(key: str, manifest: bytes) -> List[str]:
+    """Chunk keys named by a manifest body "<nonce>:<count>" (older: "<count>")"""
+    nonce, _, count = manifest.decode().rpartition(":")
+    prefix = f"{key}:{nonce}" if nonce else key
+    return [f"{prefix}:chunk:{i}" for i in range(int(count))]
 
 
 class FetchRequest(BaseModel):
@@ -132,6 +304,13 @@ class FetchRequest(BaseModel):
     intelligence_tags: Optional[List[str]] = Field(
         None, description="Intelligence tags"
     )
+    return_raw: bool = Field(
+        False, description="Return the body base64-encoded instead of decoded"
+    )
+
+
+# fetch_url accepts validated API models and internal requests alike
+AnyRequest = Union[FetchRequest, ProxyRequest]
 
 
 class BulkFetchRequest(BaseModel):
@@ -147,6 +326,13 @@ class BulkFetchRequest(BaseModel):
     )
 
 
+class MaintenanceRequest(BaseModel):
+    """Pydantic model for combined maintenance runs"""
+
+    include_blocked: bool = Field(True, description="Include blocked requests")
+    blocked_limit: int = Field(10, description="Blocked requests to return")
+
+
 class ProxyConfig:
     """Configuration management"""
 
@@ -160,9 +346,11 @@ class ProxyConfig:
             "proxy": {
                 "host": "0.0.0.0",
                 "port": 8081,
-                "workers": 4,
+                "workers": 1,
+                "backlog": 2048,
                 "timeout": 30,
                 "max_concurrent": 100,
+                "max_body_mb": 50,
             },
             "caching": {
                 "enabled": True,
@@ -170,6 +358,12 @@ class ProxyConfig:
                 "redis_url": "redis://localhost:6379/0",
                 "max_size_mb": 100,
             },
+            "connector": {
+                "limit": 0,
+                "limit_per_host": 30,
+                "keepalive_timeout": 30,
+                "ttl_dns_cache": 300,
+            },
             "security": {
                 "api_key": None,
                 "allowed_domains": [],
@@ -196,16 +390,35 @@ class ProxyConfig:
         }
 
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, "r") as f:
-                    self.config = yaml.safe_load(f) or default_config
-            else:
-                self.config = default_config
-                self.save_config()
+            with open(self.config_path, "r") as f:
+                self.config = yaml.safe_load(f) or default_config
+        except FileNotFoundError:
+            self.config = default_config
+            self.save_config()
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
             self.config = default_config
 
+        self._resolve_settings()
+
+    def _resolve_settings(self):
+        """Flatten the settings read on every request into attributes"""
+        proxy_config = self.config.get("proxy", {})
+        caching_config = self.config.get("caching", {})
+        rate_limiting = self.config.get("security", {}).get("rate_limiting", {})
+
+        self.show_requests = proxy_config.get("show_requests", True)
+        self.max_body_bytes = proxy_config.get("max_body_mb", 50) * 1024 * 1024
+        self.cache_enabled = bool(caching_config.get("enabled"))
+        self.cache_ttl = caching_config.get("ttl", 3600)
+        self.cache_chunk_size = caching_config.get("chunk_size_kb", 512) * 1024
+        self.local_cache_bytes = caching_config.get("local_max_mb", 64) * 1024 * 1024
+        self.local_cache_ttl = caching_config.get("local_ttl", 60)
+        self.rate_limit_enabled = bool(rate_limiting.get("enabled"))
+        self.rate_limit_per_minute = rate_limiting.get("requests_per_minute", 60)
+        self.rate_limit_per_hour = rate_limiting.get("requests_per_hour", 1000)
+        self.user_agents = tuple(self.config.get("user_agents") or ())
+
     def save_config(self):
         """Save proxy configuration"""
         try:
@@ -215,13 +428,154 @@ class ProxyConfig:
             logger.error(f"Failed to save config: {e}")
 
 
+class IntelligenceStore:
+    """SQLite (WAL) storage for intelligence records"""
+
+    def __init__(self, db_path: Path, commit_interval: float = 0.1):
+        self.db_path = db_path
+        self.commit_interval = commit_interval
+        self._db = None
+        self._dirty = False
+        self._commit_task = None
+
+    async def open(self):
+        """Open the database and start the batched commit task"""
+        self._db = await aiosqlite.connect(str(self.db_path))
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        await self._db.execute("PRAGMA mmap_size=268435456")
+        await self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "ts INTEGER, url TEXT, hash TEXT, tags TEXT, size INT)"
+        )
+        await self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_records_ts ON records (ts)"
+        )
+        await self._db.commit()
+        self._commit_task = asyncio.create_task(self._commit_loop())
+
+    async def close(self):
+        """Flush pending writes and close the database"""
+        if self._commit_task:
+            self._commit_task.cancel()
+            try:
+                await self._commit_task
+            except asyncio.CancelledError:
+                pass
+        if self._db:
+            if self._dirty:
+                await self._db.commit()
+            await self._db.close()
+
+    async def add(self, url: str, cache_key: str, tags: List[str], size: int):
+        """Insert a record; the commit is batched by the background task"""
+        await self._db.execute(
+            "INSERT INTO records (ts, url, hash, tags, size) VALUES (?, ?, ?, ?, ?)",
+            (int(time.time() * 1000), url, cache_key, json.dumps(tags), size),
+        )
+        self._dirty = True
+
+    async def prune(self, keep: int = 1000) -> Tuple[int, int]:
+        """Delete all but the newest `keep` records; returns (deleted, remaining)"""
+        cursor = await self._db.execute(
+            "DELETE FROM records WHERE ts < "
+            "(SELECT ts FROM records ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+            (keep - 1,),
+        )
+        deleted = cursor.rowcount
+        await self._db.commit()
+        async with self._db.execute("SELECT COUNT(*) FROM records") as cursor:
+            (remaining,) = await cursor.fetchone()
+        return deleted, remaining
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent records without their content"""
+        async with self._db.execute(
+            "SELECT ts, url, hash, tags, size FROM records ORDER BY ts DESC LIMIT ?",
+            (limit,),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(ts / 1000).isoformat(),
+                "url": url,
+                "hash": cache_key,
+                "tags": json.loads(tags),
+                "size": size,
+            }
+            for ts, url, cache_key, tags, size in rows
+        ]
+
+    async def _commit_loop(self):
+        """Commit pending inserts every commit_interval seconds"""
+        while True:
+            await asyncio.sleep(self.commit_interval)
+            if not self._dirty:
+                continue
+            self._dirty = False
+            try:
+                await self._db.commit()
+            except Exception as e:
+                logger.error(f"Intelligence commit failed: {e}")
+
+
+class AdmissionController:
+    """Concurrency gate whose limit can be changed while tasks are waiting"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify(1)
+
+    async def set_limit(self, limit: int):
+        """Resize the gate; waiters are re-checked against the new limit"""
+        async with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+
 class ShadowWebfetchProxy:
     """Advanced webfetch proxy for SHADOW operations"""
 
+    # Cache values larger than caching.chunk_size_kb are stored as
+    # proxy_cache:<key>:<nonce>:chunk:<n> with a "chunks:<nonce>:<count>" manifest
+    CACHE_MANIFEST_PREFIX = b"chunks:"
+
+    # Redirects are followed by _send (same rules and limit as aiohttp)
+    REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 10
+
     def __init__(self, config: ProxyConfig = None):
         self.config = config or ProxyConfig()
         self.redis_client = None
         self.session = None
+        self._ssl_ctx = None
+
+        # In-process cache in front of Redis for hot keys, bounded by body size
+        self._local_cache = cachetools.TTLCache(
+            maxsize=self.config.local_cache_bytes,
+            ttl=self.config.local_cache_ttl,
+            getsizeof=lambda response: len(response.content) or 1,
+        )
+        self.intelligence_store = None
         self.intelligence_dir = Path(
             self.config.config.get("intelligence", {}).get(
                 "storage_path", "intelligence"
@@ -229,14 +583,17 @@ class ShadowWebfetchProxy:
         )
         self.intelligence_dir.mkdir(exist_ok=True)
 
+        # Append-only blocked request log (JSON lines)
+        self.blocked_file = self.intelligence_dir / "blocked_requests.jsonl"
+        self._blocked_lock = asyncio.Lock()
+        self._blocked_writes = 0
+        self._blocked_trim_task = None
+
         # Request tracking
         self.request_counts = {}
-        self.blocked_domains = set(
-            self.config.config.get("security", {}).get("blocked_domains", [])
-        )
-        self.allowed_domains = set(
-            self.config.config.get("security", {}).get("allowed_domains", [])
-        )
+        self._ua_rng = random.Random()
+        self._rate_window = (None, "", "")
+        self.compile_domain_rules()
 
         logger.info("SHADOW Webfetch Proxy initialized")
 
@@ -244,18 +601,32 @@ class ShadowWebfetchProxy:
         """Initialize proxy components"""
         try:
             # Initialize Redis for caching
-            if self.config.config.get("caching", {}).get("enabled"):
+            if self.config.cache_enabled:
                 redis_url = self.config.config.get("caching", {}).get(
                     "redis_url", "redis://localhost:6379/0"
                 )
                 self.redis_client = await redis.from_url(redis_url)
                 logger.info("Redis cache initialized")
 
-            # Initialize HTTP session
+            # Initialize intelligence storage
+            if self.config.config.get("intelligence", {}).get("enabled"):
+                self.intelligence_store = IntelligenceStore(
+                    self.intelligence_dir / "intel.db"
+                )
+                await self.intelligence_store.open()
+                logger.info("Intelligence store initialized")
+
+            # One verifying SSL context, shared by every request
+            self._ssl_ctx = ssl.create_default_context(cafile=certifi.where())
+
+            # Initialize HTTP session; limit=0 leaves the total uncapped so
+            # bulk_fetch's concurrent_limit admission gate is the real limit
+            connector_config = self.config.config.get("connector", {})
             connector = aiohttp.TCPConnector(
-                limit=100,
-                limit_per_host=30,
-                keepalive_timeout=30,
+                limit=connector_config.get("limit", 0),
+                limit_per_host=connector_config.get("limit_per_host", 30),
+                keepalive_timeout=connector_config.get("keepalive_timeout", 30),
+                ttl_dns_cache=connector_config.get("ttl_dns_cache", 300),
                 enable_cleanup_closed=True,
             )
 
@@ -263,6 +634,8 @@ class ShadowWebfetchProxy:
             self.session = aiohttp.ClientSession(
                 connector=connector,
                 timeout=timeout,
+                # Shared by every caller, so upstream cookies must not persist
+                cookie_jar=aiohttp.DummyCookieJar(),
                 headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
                 },
@@ -280,96 +653,168 @@ class ShadowWebfetchProxy:
             await self.session.close()
         if self.redis_client:
             await self.redis_client.close()
+        if self.intelligence_store:
+            await self.intelligence_store.close()
         logger.info("Proxy resources cleaned up")
 
-    def _generate_cache_key(self, request: FetchRequest) -> str:
+    def _generate_cache_key(self, request: AnyRequest) -> str:
         """Generate cache key for request"""
-        headers_str = ""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(request.method.encode())
+        h.update(b"\x00")
+        h.update(request.url.encode())
         if request.headers:
-            headers_str = hashlib.md5(
-                str(sorted(request.headers.items())).encode()
-            ).hexdigest()
-        content = f"{request.method}:{request.url}:{headers_str}"
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+            for k, v in sorted(request.headers.items()):
+                h.update(b"\x00")
+                h.update(k.encode())
+                h.update(b"\x01")
+                h.update(v.encode())
+        if request.return_raw:
+            h.update(b"\x00raw")
+        return h.hexdigest()
+
+    def compile_domain_rules(self):
+        """Build the domain matchers from the current security settings"""
+        security_config = self.config.config.get("security", {})
+        # Same label-boundary policy as the plugin: an entry matches the
+        # host itself and its subdomains, never an arbitrary substring
+        self.blocked_domains = domain_set(security_config.get("blocked_domains"))
+        self.allowed_domains = domain_set(security_config.get("allowed_domains"))
 
     def _is_domain_allowed(self, url: str) -> bool:
         """Check if domain is allowed"""
         try:
-            domain = urlparse(url).netloc.lower()
-
-            # Check blocked domains
-            if any(blocked in domain for blocked in self.blocked_domains):
-                return False
-
-            # Check allowed domains (if configured)
-            if self.allowed_domains and not any(
-                allowed in domain for allowed in self.allowed_domains
-            ):
-                return False
-
-            return True
+            return is_domain_allowed(
+                _netloc(url), self.blocked_domains, self.allowed_domains
+            )
         except Exception:
             return False
 
-    async def _check_rate_limit(self, api_key: str = None) -> bool:
-        """Check rate limiting"""
-        if (
-            not self.config.config.get("security", {})
-            .get("rate_limiting", {})
-            .get("enabled")
-        ):
-            return True
+    def _rate_limit_windows(self) -> Tuple[str, str]:
+        """Current minute and hour window stamps, reformatted once per minute"""
+        minute = int(time.time()) // 60
+        if minute != self._rate_window[0]:
+            stamp = time.strftime("%Y%m%d%H%M", time.localtime(minute * 60))
+            self._rate_window = (minute, stamp, stamp[:-2])
+        return self._rate_window[1], self._rate_window[2]
+
+    async def _check_and_lookup(
+        self, api_key: str = None, cache_key: str = None
+    ) -> Tuple[bool, Optional[bytes]]:
+        """Check rate limiting and read the cache entry in one Redis round trip"""
+        if not self.redis_client:
+            return True, None
 
-        now = datetime.now()
-        minute_key = f"rate_limit:{api_key or 'anonymous'}:{now.strftime('%Y%m%d%H%M')}"
-        hour_key = f"rate_limit:{api_key or 'anonymous'}:{now.strftime('%Y%m%d%H')}"
+        rate_limited = self.config.rate_limit_enabled
+        if not rate_limited and not cache_key:
+            return True, None
 
-        if self.redis_client:
-            minute_count = await self.redis_client.get(minute_key) or 0
-            hour_count = await self.redis_client.get(hour_key) or 0
+        pipe = self.redis_client.pipeline()
+        if rate_limited:
+            minute_stamp, hour_stamp = self._rate_limit_windows()
+            client = api_key or "anonymous"
+            minute_key = f"rate_limit:{client}:{minute_stamp}"
+            hour_key = f"rate_limit:{client}:{hour_stamp}"
 
-            if int(minute_count) >= 60 or int(hour_count) >= 1000:
-                return False
-
-            # Increment counters
-            pipe = self.redis_client.pipeline()
+            # Increment first and compare the new counts; rejected requests
+            # simply age out with the key
             pipe.incr(minute_key)
             pipe.expire(minute_key, 60)
             pipe.incr(hour_key)
             pipe.expire(hour_key, 3600)
-            await pipe.execute()
-
-        return True
+        if cache_key:
+            pipe.get(f"proxy_cache:{cache_key}")
+        results = await pipe.execute()
+
+        cached_data = results.pop() if cache_key else None
+        if rate_limited:
+            minute_count, _, hour_count, _ = results
+            if (
+                minute_count > self.config.rate_limit_per_minute
+                or hour_count > self.config.rate_limit_per_hour
+            ):
+                return False, None
 
-    async def _get_cached_response(self, cache_key: str) -> Optional[ProxyResponse]:
-        """Get cached response"""
-        if not self.redis_client:
-            return None
+        return True, cached_data
 
+    async def _get_cached_response(
+        self, cache_key: str, cached_data: bytes
+    ) -> Optional[ProxyResponse]:
+        """Decode a cache entry read by _check_and_lookup"""
+        key = f"proxy_cache:{cache_key}"
         try:
-            cached_data = await self.redis_client.get(f"proxy_cache:{cache_key}")
-            if cached_data:
-                return ProxyResponse(**json.loads(cached_data))
+            if cached_data.startswith(self.CACHE_MANIFEST_PREFIX):
+                manifest = cached_data[len(self.CACHE_MANIFEST_PREFIX) :]
+                chunks = await self.redis_client.mget(_chunk_keys(key, manifest))
+                if any(chunk is None for chunk in chunks):
+                    return None
+                cached_data = b"".join(chunks)
+            return _decode_cache_entry(cached_data)
         except Exception as e:
             logger.error(f"Cache retrieval failed: {e}")
 
         return None
 
+    def _cache_locally(self, cache_key: str, response: ProxyResponse):
+        """Keep a response in the in-process cache unless it exceeds the budget"""
+        try:
+            self._local_cache[cache_key] = response
+        except ValueError:
+            pass  # larger than the whole cache
+
     async def _cache_response(
-        self, cache_key: str, response: ProxyResponse, ttl: int = 3600
+        self, cache_key: str, response: ProxyResponse, ttl: int = None
     ):
-        """Cache response"""
+        """Cache response (always written with an expiry)"""
+        self._cache_locally(cache_key, response)
         if not self.redis_client:
             return
 
+        ttl = ttl or self.config.cache_ttl
+        chunk_size = self.config.cache_chunk_size
+        key = f"proxy_cache:{cache_key}"
         try:
-            await self.redis_client.setex(
-                f"proxy_cache:{cache_key}", ttl, json.dumps(asdict(response))
-            )
+            payload = _encode_cache_entry(response)
+            if len(payload) <= chunk_size:
+                await self.redis_client.setex(key, ttl, payload)
+                return
+
+            # Split oversized payloads so no single value stalls Redis;
+            # the manifest is written last so readers never see partial data,
+            # and a per-write nonce keeps concurrent writers' chunks apart
+            chunks = [
+                payload[i : i + chunk_size] for i in range(0, len(payload), chunk_size)
+            ]
+            nonce = os.urandom(6).hex()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i, chunk in enumerate(chunks):
+                pipe.setex(f"{key}:{nonce}:chunk:{i}", ttl, chunk)
+            manifest = self.CACHE_MANIFEST_PREFIX + f"{nonce}:{len(chunks)}".encode()
+            pipe.setex(key, ttl, manifest)
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Cache storage failed: {e}")
 
-    def _log_blocked_request(self, request: FetchRequest, reason: str, details: str):
+    async def _save_intelligence(
+        self, request: AnyRequest, response: ProxyResponse, cache_key: str
+    ):
+        """Persist an intelligence record for a fetched response"""
+        if not self.intelligence_store:
+            return
+
+        try:
+            await self.intelligence_store.add(
+                response.url,
+                cache_key,
+                request.intelligence_tags or [],
+                response.size,
+            )
+        except Exception as e:
+            logger.error(f"Failed to save intelligence: {e}")
+
+    async def _log_blocked_request(
+        self, request: AnyRequest, reason: str, details: str
+    ):
         """Log blocked requests for analysis"""
         try:
             blocked_log = {
@@ -386,43 +831,98 @@ class ShadowWebfetchProxy:
             # Log to main logger
             logger.warning(f"BLOCKED REQUEST: {reason} - {request.url} - {details}")
 
-            # Save to blocked requests file
-            blocked_file = self.intelligence_dir / "blocked_requests.json"
+            # Append one JSON line; trimming happens off the request path
+            line = orjson.dumps(blocked_log, option=orjson.OPT_APPEND_NEWLINE)
+            async with self._blocked_lock:
+                async with aiofiles.open(self.blocked_file, "ab") as f:
+                    await f.write(line)
 
-            # Read existing blocked requests
-            blocked_requests = []
-            if blocked_file.exists():
-                try:
-                    with open(blocked_file, "r") as f:
-                        blocked_requests = json.load(f)
-                except:
-                    pass
+            self._blocked_writes += 1
+            if self._blocked_writes >= 1000:
+                self._blocked_writes = 0
+                self._blocked_trim_task = asyncio.create_task(self._trim_blocked_log())
 
-            # Add new blocked request
-            blocked_requests.append(blocked_log)
+        except Exception as e:
+            logger.error(f"Failed to log blocked request: {e}")
 
-            # Keep only last 1000 blocked requests
-            if len(blocked_requests) > 1000:
-                blocked_requests = blocked_requests[-1000:]
+    async def _trim_blocked_log(self):
+        """Keep only the last 1000 blocked requests"""
+        try:
+            async with self._blocked_lock:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, _trim_jsonl, self.blocked_file, 1000)
+        except Exception as e:
+            logger.error(f"Failed to trim blocked requests: {e}")
+
+    async def _send(
+        self, request: AnyRequest, kwargs: Dict[str, Any]
+    ) -> aiohttp.ClientResponse:
+        """Send a request, following redirects with a cookie jar of its own.
+
+        The shared session keeps no cookies, so Set-Cookie headers from
+        redirect hops are carried here and never reach other callers.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + request.timeout
+        jar = aiohttp.CookieJar(unsafe=True)
+        if request.cookies:
+            jar.update_cookies(request.cookies)
+
+        method, url = request.method.upper(), URL(request.url)
+        for _ in range(self.MAX_REDIRECTS + 1):
+            # request.timeout covers the whole chain, as it did with aiohttp
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            response = await self.session.request(
+                method,
+                url,
+                allow_redirects=False,
+                cookies=jar.filter_cookies(url),
+                timeout=aiohttp.ClientTimeout(total=remaining),
+                **kwargs,
+            )
+            location = response.headers.get("Location")
+            if not (
+                request.follow_redirects
+                and location
+                and response.status in self.REDIRECT_STATUSES
+            ):
+                return response
+            next_url = response.url.join(URL(location))
+            if next_url.scheme not in ("http", "https"):
+                return response
 
-            # Save updated list
-            with open(blocked_file, "w") as f:
-                json.dump(blocked_requests, f, indent=2)
+            jar.update_cookies(response.cookies, response.url)
+            response.release()
 
-        except Exception as e:
-            logger.error(f"Failed to log blocked request: {e}")
+            if (response.status == 303 and method != "HEAD") or (
+                response.status in (301, 302) and method == "POST"
+            ):
+                method = "GET"
+                kwargs.pop("data", None)
+            if next_url.origin() != url.origin():
+                # Credentials meant for one site are not forwarded to another
+                kwargs["headers"] = {
+                    k: v
+                    for k, v in kwargs["headers"].items()
+                    if k.lower() != "authorization"
+                }
+            url = next_url
+
+        raise ValueError(f"Too many redirects (more than {self.MAX_REDIRECTS})")
 
     async def fetch_url(
-        self, request: FetchRequest, api_key: str = None
+        self, request: AnyRequest, api_key: str = None
     ) -> ProxyResponse:
         """Fetch URL with proxy capabilities"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Generate request ID for tracking
         request_id = (
             hashlib.md5(f"{request.url}{time.time()}".encode()).hexdigest()[:6].upper()
         )
-        if self.config.config.get("proxy", {}).get("show_requests", True):
+        if self.config.show_requests:
             display_request(request_id, request.method, request.url, api_key=api_key)
 
         try:
@@ -430,7 +930,7 @@ class ShadowWebfetchProxy:
             if not self._is_domain_allowed(request.url):
                 # Log blocked request
                 logger.warning(f"BLOCKED: Domain not allowed - {request.url}")
-                self._log_blocked_request(
+                await self._log_blocked_request(
                     request, "DOMAIN_BLOCKED", "Domain blocked by security policy"
                 )
 
@@ -440,17 +940,28 @@ class ShadowWebfetchProxy:
                     headers={},
                     url=request.url,
                     final_url=request.url,
-                    execution_time=time.time() - start_time,
+                    execution_time=time.perf_counter() - start_time,
                     size=0,
                     success=False,
                     error="Domain blocked by security policy",
                 )
 
-            # Rate limiting
-            if not await self._check_rate_limit(api_key):
+            # Rate limiting and cache lookup share one Redis round trip
+            # (the Redis GET is skipped when the in-process cache has the key)
+            cache_key = self._generate_cache_key(request)
+            use_cache = self.config.cache_enabled and request.cache_enabled
+            local_hit = None
+            if use_cache:
+                local_hit = self._local_cache.get(cache_key)
+            allowed, cached_data = await self._check_and_lookup(
+                api_key, cache_key if use_cache and local_hit is None else None
+            )
+            if not allowed:
                 # Log rate limit block
                 logger.warning(f"BLOCKED: Rate limit exceeded - {request.url}")
-                self._log_blocked_request(request, "RATE_LIMIT", "Rate limit exceeded")
+                await self._log_blocked_request(
+                    request, "RATE_LIMIT", "Rate limit exceeded"
+                )
 
                 return ProxyResponse(
                     status_code=429,
@@ -458,43 +969,47 @@ class ShadowWebfetchProxy:
                     headers={},
                     url=request.url,
                     final_url=request.url,
-                    execution_time=time.time() - start_time,
+                    execution_time=time.perf_counter() - start_time,
                     size=0,
                     success=False,
                     error="Rate limit exceeded",
                 )
 
             # Check cache
-            cache_key = self._generate_cache_key(request)
-            if request.cache_enabled:
-                cached_response = await self._get_cached_response(cache_key)
+            cached_response = local_hit
+            if cached_response is None and cached_data:
+                cached_response = await self._get_cached_response(
+                    cache_key, cached_data
+                )
                 if cached_response:
-                    if self.config.config.get("proxy", {}).get("show_requests", True):
-                        display_request(
-                            cache_key[:6].upper(),
-                            request.method,
-                            request.url,
-                            status=f"{cached_response.status_code}",
-                            time_ms=int(cached_response.execution_time * 1000),
-                            size=cached_response.size,
-                            cached=True,
-                            api_key=api_key,
-                        )
-                    logger.info(f"Cache hit for {request.url}")
-                    cached_response.execution_time = time.time() - start_time
-                    return cached_response
+                    self._cache_locally(cache_key, cached_response)
+            if cached_response:
+                if self.config.show_requests:
+                    display_request(
+                        cache_key[:6].upper(),
+                        request.method,
+                        request.url,
+                        status=f"{cached_response.status_code}",
+                        time_ms=int(cached_response.execution_time * 1000),
+                        size=cached_response.size,
+                        cached=True,
+                        api_key=api_key,
+                    )
+                logger.info(f"Cache hit for {request.url}")
+                # Entries are shared across requests, so return a copy
+                return replace(
+                    cached_response, execution_time=time.perf_counter() - start_time
+                )
 
             # Prepare headers
-            headers = request.headers or {}
+            # Copied: bulk requests share one common_headers dict
+            headers = dict(request.headers) if request.headers else {}
             if request.user_agent:
                 headers["User-Agent"] = request.user_agent
             elif "User-Agent" not in headers:
                 # Use random user agent
-                user_agents = self.config.config.get("user_agents", [])
-                if user_agents:
-                    import random
-
-                    headers["User-Agent"] = random.choice(user_agents)
+                if self.config.user_agents:
+                    headers["User-Agent"] = self._ua_rng.choice(self.config.user_agents)
 
             # Add intelligence headers
             headers["X-SHADOW-Proxy"] = "enabled"
@@ -502,65 +1017,80 @@ class ShadowWebfetchProxy:
                 f"{request.url}{time.time()}".encode()
             ).hexdigest()[:8]
 
-            # Prepare request
+            # Prepare request (redirects and cookies are handled by _send)
             kwargs = {
                 "headers": headers,
-                "allow_redirects": request.follow_redirects,
-                "ssl": ssl.create_default_context(cafile=certifi.where())
-                if request.verify_ssl
-                else False,
+                "ssl": self._ssl_ctx if request.verify_ssl else False,
             }
 
-            if request.cookies:
-                kwargs["cookies"] = request.cookies
-
             if request.data and request.method.upper() != "GET":
                 kwargs["data"] = request.data
 
-            # Execute request
-            timeout = aiohttp.ClientTimeout(total=request.timeout)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.request(
-                    request.method, request.url, **kwargs
-                ) as response:
-                    content = await response.text()
-
-                    proxy_response = ProxyResponse(
-                        status_code=int(response.status),
-                        content=content,
-                        headers=dict(response.headers),
-                        url=request.url,
-                        final_url=str(response.url),
-                        execution_time=time.time() - start_time,
-                        size=len(content.encode("utf-8")),
-                        success=(200 <= int(response.status) < 400)
-                        if not request.allow_status_codes
-                        else int(response.status) in request.allow_status_codes,
-                    )
-
-                    # Cache successful responses
-                    if proxy_response.success and request.cache_enabled:
-                        await self._cache_response(cache_key, proxy_response)
-
-                    # Display completion
-                    if self.config.config.get("proxy", {}).get("show_requests", True):
-                        display_request(
-                            request_id,
-                            request.method,
-                            request.url,
-                            status=f"{proxy_response.status_code}",
-                            time_ms=int(proxy_response.execution_time * 1000),
-                            size=proxy_response.size,
-                            cached=False,
-                            api_key=api_key,
+            # Execute request on the shared session so connections are reused
+            async with await self._send(request, kwargs) as response:
+                # Stream the body in 64 KiB chunks so oversized responses are
+                # cut off early, then decode once with the declared charset
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk
+                    if len(body) > self.config.max_body_bytes:
+                        raise ValueError(
+                            f"Response body exceeds {self.config.max_body_bytes} bytes"
                         )
+                # Binary bodies (or return_raw) skip text decoding entirely. Read
+                # the raw header: aiohttp reports a missing Content-Type as
+                # application/octet-stream
+                content_type = response.headers.get("Content-Type", "").lower()
+                content_encoding = None
+                if request.return_raw or content_type.startswith(BINARY_CONTENT_TYPES):
+                    content = base64.b64encode(body).decode("ascii")
+                    content_encoding = "base64"
+                else:
+                    try:
+                        content = body.decode(response.charset or "utf-8", "replace")
+                    except LookupError:
+                        content = body.decode("utf-8", "replace")
+
+                proxy_response = ProxyResponse(
+                    status_code=int(response.status),
+                    content=content,
+                    headers=dict(response.headers),
+                    url=request.url,
+                    final_url=str(response.url),
+                    execution_time=time.perf_counter() - start_time,
+                    size=len(body),
+                    content_encoding=content_encoding,
+                    success=(200 <= int(response.status) < 400)
+                    if not request.allow_status_codes
+                    else int(response.status) in request.allow_status_codes,
+                )
 
-                    return proxy_response
+                # Cache successful responses
+                if proxy_response.success and use_cache:
+                    await self._cache_response(cache_key, proxy_response)
+
+                if proxy_response.success:
+                    await self._save_intelligence(request, proxy_response, cache_key)
+
+                # Display completion
+                if self.config.show_requests:
+                    display_request(
+                        request_id,
+                        request.method,
+                        request.url,
+                        status=f"{proxy_response.status_code}",
+                        time_ms=int(proxy_response.execution_time * 1000),
+                        size=proxy_response.size,
+                        cached=False,
+                        api_key=api_key,
+                    )
+
+                return proxy_response
 
         except asyncio.TimeoutError:
             # Log timeout
             logger.warning(f"BLOCKED: Request timeout - {request.url}")
-            self._log_blocked_request(request, "TIMEOUT", "Request timeout")
+            await self._log_blocked_request(request, "TIMEOUT", "Request timeout")
 
             return ProxyResponse(
                 status_code=408,
@@ -576,7 +1106,7 @@ class ShadowWebfetchProxy:
         except Exception as e:
             # Log general errors
             logger.warning(f"BLOCKED: General error - {request.url} - {str(e)}")
-            self._log_blocked_request(request, "ERROR", str(e))
+            await self._log_blocked_request(request, "ERROR", str(e))
 
             return ProxyResponse(
                 status_code=500,
@@ -584,7 +1114,7 @@ class ShadowWebfetchProxy:
                 headers={},
                 url=request.url,
                 final_url=request.url,
-                execution_time=time.time() - start_time,
+                execution_time=time.perf_counter() - start_time,
                 size=0,
                 success=False,
                 error=str(e),
@@ -594,19 +1124,24 @@ class ShadowWebfetchProxy:
         self, bulk_request: BulkFetchRequest, api_key: str = None
     ) -> List[ProxyResponse]:
         """Bulk fetch URLs concurrently"""
-        semaphore = asyncio.Semaphore(bulk_request.concurrent_limit)
+        admission = AdmissionController(bulk_request.concurrent_limit)
 
-        async def fetch_with_semaphore(url: str) -> ProxyResponse:
-            async with semaphore:
-                request = FetchRequest(
+        async def fetch_with_admission(url: str) -> ProxyResponse:
+            async with admission:
+                # Internal dataclass: the URLs were validated with bulk_request
+                request = ProxyRequest(
                     url=url,
-                    method="GET",
-                    headers=bulk_request.common_headers or {},
+                    headers=bulk_request.common_headers,
                     intelligence_tags=bulk_request.intelligence_tags,
                 )
-                return await self.fetch_url(request, api_key)
+                result = await self.fetch_url(request, api_key)
 
-        tasks = [fetch_with_semaphore(url) for url in bulk_request.urls]
+            # Back off on 429s without cancelling the rest of the job
+            if result.status_code == 429:
+                await admission.set_limit(admission.limit // 2)
+            return result
+
+        tasks = [fetch_with_admission(url) for url in bulk_request.urls]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
         # Handle exceptions
@@ -656,6 +1191,7 @@ app = FastAPI(
     description="Advanced webfetch proxy for opencode intelligence operations",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -667,6 +1203,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 
 async def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Extract API key from authorization header"""
@@ -716,25 +1255,54 @@ async def health_check():
 
 
 @app.post("/fetch")
-async def fetch_url(request: FetchRequest, api_key: str = Depends(get_api_key)):
-    """Fetch a single URL"""
+async def fetch_url(
+    request: FetchRequest, raw: bool = False, api_key: str = Depends(get_api_key)
+):
+    """Fetch a single URL (raw=true returns the body itself instead of JSON)"""
     try:
+        if raw:
+            # Keep the upstream bytes instead of a decoded-and-re-encoded copy
+            # (raw entries have their own cache key)
+            request.return_raw = True
         result = await proxy.fetch_url(request, api_key)
 
         if not result.success and result.error:
             raise HTTPException(status_code=result.status_code, detail=result.error)
 
-        return {
-            "success": result.success,
-            "status_code": result.status_code,
-            "url": result.url,
-            "final_url": result.final_url,
-            "execution_time": result.execution_time,
-            "size": result.size,
-            "content": result.content,
-            "headers": result.headers,
-            "error": result.error,
-        }
+        if raw:
+            content_type = next(
+                (v for k, v in result.headers.items() if k.lower() == "content-type"),
+                "application/octet-stream",
+            )
+            # Raw bodies go back byte for byte with the upstream content type
+            if result.content_encoding == "base64":
+                return Response(
+                    content=base64.b64decode(result.content),
+                    status_code=result.status_code,
+                    media_type=content_type,
+                )
+
+            # Only bodies the proxy generated itself are left as text
+            return Response(
+                content=result.content,
+                status_code=result.status_code,
+                media_type=content_type.split(";", 1)[0],
+            )
+
+        return ORJSONResponse(
+            {
+                "success": result.success,
+                "status_code": result.status_code,
+                "url": result.url,
+                "final_url": result.final_url,
+                "execution_time": result.execution_time,
+                "size": result.size,
+                "content": result.content,
+                "content_encoding": result.content_encoding,
+                "headers": result.headers,
+                "error": result.error,
+            }
+        )
 
     except HTTPException:
         raise
@@ -782,40 +1350,24 @@ async def bulk_fetch_urls(
 """
         logger.info(summary)
 
-        results = await proxy.bulk_fetch(request, api_key)
-
-        # Display bulk summary
-        successful = sum(1 for r in results if r.success)
-        failed = sum(1 for r in results if not r.success)
-        total_time = sum(r.execution_time for r in results)
-        avg_time = (total_time / len(results) * 1000) if results else 0
-
-        print(f"""
-📦 BULK FETCH COMPLETE
-{border}
-✅ Successful: {successful}
-❌ Failed: {failed}
-📊 Total: {len(request.urls)}
-⏱️ Avg Time: {int(avg_time)}ms
-{border}
-""")
-
-        return {
-            "total_urls": len(request.urls),
-            "successful": successful,
-            "failed": failed,
-            "results": [
-                {
-                    "url": r.url,
-                    "success": r.success,
-                    "status_code": r.status_code,
-                    "execution_time": r.execution_time,
-                    "size": r.size,
-                    "error": r.error,
-                }
-                for r in results
-            ],
-        }
+        return ORJSONResponse(
+            {
+                "total_urls": len(request.urls),
+                "successful": successful,
+                "failed": failed,
+                "results": [
+                    {
+                        "url": r.url,
+                        "success": r.success,
+                        "status_code": r.status_code,
+                        "execution_time": r.execution_time,
+                        "size": r.size,
+                        "error": r.error,
+                    }
+                    for r in results
+                ],
+            }
+        )
 
     except Exception as e:
         logger.error(f"Bulk fetch failed: {e}")
@@ -826,26 +1378,9 @@ async def bulk_fetch_urls(
 async def list_intelligence(limit: int = 50):
     """List intelligence records"""
     try:
-        intelligence_files = list(proxy.intelligence_dir.glob("webfetch_*.json"))
-        intelligence_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-
         records = []
-        for filepath in intelligence_files[:limit]:
-            try:
-                async with aiofiles.open(filepath, "r") as f:
-                    content = await f.read()
-                    record = json.loads(content)
-                    records.append(
-                        {
-                            "filename": filepath.name,
-                            "timestamp": record.get("timestamp"),
-                            "url": record.get("url"),
-                            "tags": record.get("tags", []),
-                            "size": record.get("metadata", {}).get("size", 0),
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Failed to read intelligence file {filepath}: {e}")
+        if proxy.intelligence_store:
+            records = await proxy.intelligence_store.list(limit)
 
         return {"total_records": len(records), "records": records}
 
@@ -858,24 +1393,19 @@ async def list_intelligence(limit: int = 50):
 async def get_blocked_requests(limit: int = 50):
     """Get list of blocked requests"""
     try:
-        blocked_file = proxy.intelligence_dir / "blocked_requests.json"
-
-        if not blocked_file.exists():
+        try:
+            async with aiofiles.open(proxy.blocked_file, "rb") as f:
+                data = await f.read()
+        except FileNotFoundError:
             return {"blocked_requests": [], "total": 0}
 
-        with open(blocked_file, "r") as f:
-            blocked_requests = json.load(f)
-
-        # Return last 'limit' requests
-        recent_requests = (
-            blocked_requests[-limit:]
-            if limit < len(blocked_requests)
-            else blocked_requests
-        )
+        lines = data.splitlines()
+        blocked_requests = lines[-limit:] if limit < len(lines) else lines
+        recent_requests = [orjson.loads(line) for line in blocked_requests]
 
         return {
             "blocked_requests": recent_requests,
-            "total": len(blocked_requests),
+            "total": len(lines),
             "recent_count": len(recent_requests),
         }
     except Exception as e:
@@ -883,39 +1413,77 @@ async def get_blocked_requests(limit: int = 50):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _cleanup_intelligence(intelligence_dir: Path) -> Dict[str, Any]:
+    """Remove all but the newest 1000 intelligence files"""
+    stats = {"deleted": 0, "errors": [], "remaining": 0}
+    if not intelligence_dir.exists():
+        return stats
+
+    # One directory pass; names and mtimes come from the scandir entries
+    with os.scandir(intelligence_dir) as it:
+        entries = [
+            (e.stat(follow_symlinks=False).st_mtime, e.name)
+            for e in it
+            if e.name.startswith("webfetch_") and e.name.endswith(".json")
+        ]
+
+    # Keep the newest 1000 without sorting the whole directory
+    keep = {name for _, name in heapq.nlargest(1000, entries)}
+    victims = [name for _, name in entries if name not in keep]
+    if not victims:
+        stats["remaining"] = len(entries)
+        return stats
+
+    # Remove old files
+    for name in victims:
+        try:
+            os.unlink(intelligence_dir / name)
+            stats["deleted"] += 1
+        except FileNotFoundError:
+            pass  # removed since the scan
+        except OSError as e:
+            stats["errors"].append(str(e))
+
+    # Files that failed to unlink are still there; vanished ones are not
+    stats["remaining"] = len(keep) + len(stats["errors"])
+    return stats
+
+
 @app.post("/housekeeping/cleanup")
 async def cleanup_obsolete_files():
     """Cleanup obsolete files and perform maintenance"""
     try:
         results = {
-            "intelligence_cleanup": {"deleted": 0, "errors": []},
-            "cache_cleanup": {"deleted": 0, "errors": []},
+            "intelligence_cleanup": {"deleted": 0, "records_deleted": 0, "errors": []},
             "log_rotation": {"rotated": 0, "errors": []},
             "overall_status": "success",
         }
 
-        # Cleanup intelligence files (keep last 1000)
-        intelligence_dir = proxy.intelligence_dir
-        if intelligence_dir.exists():
-            intelligence_files = list(intelligence_dir.glob("webfetch_*.json"))
-            intelligence_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        # Filesystem work runs on a worker thread so the event loop keeps
+        # serving requests; cache entries expire on their own (SETEX)
+        loop = asyncio.get_running_loop()
+        try:
+            results["intelligence_cleanup"].update(
+                await loop.run_in_executor(
+                    None, _cleanup_intelligence, proxy.intelligence_dir
+                )
+            )
+        except Exception as e:
+            results["intelligence_cleanup"]["errors"].append(str(e))
 
-            # Remove old files
-            for file_path in intelligence_files[1000:]:
-                try:
-                    file_path.unlink()
-                    results["intelligence_cleanup"]["deleted"] += 1
-                except Exception as e:
-                    results["intelligence_cleanup"]["errors"].append(str(e))
-
-        # Count remaining files
-        remaining_intelligence = (
-            len(list(intelligence_dir.glob("webfetch_*.json")))
-            if intelligence_dir.exists()
-            else 0
-        )
+        # Intelligence records live in SQLite; keep the newest 1000
+        records_remaining = 0
+        if proxy.intelligence_store:
+            try:
+                deleted, records_remaining = await proxy.intelligence_store.prune(1000)
+                results["intelligence_cleanup"]["records_deleted"] = deleted
+            except Exception as e:
+                results["intelligence_cleanup"]["errors"].append(str(e))
 
-        results["remaining"] = {"intelligence_files": remaining_intelligence}
+        results["remaining"] = {
+            "intelligence_files": results["intelligence_cleanup"].pop("remaining", 0),
+            "intelligence_records": records_remaining,
+        }
 
         logger.info(f"Housekeeping completed: {results}")
         return results
@@ -925,23 +1493,47 @@ async def cleanup_obsolete_files():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/maintenance/run")
+async def run_maintenance(request: Optional[MaintenanceRequest] = None):
+    """Run housekeeping and report blocked requests in one round-trip"""
+    request = request or MaintenanceRequest()
+    results = {"cleanup": await cleanup_obsolete_files()}
+    if request.include_blocked:
+        results["blocked"] = await get_blocked_requests(request.blocked_limit)
+    return results
+
+
+# Redacted copy served by /config; cleared by /config/reload
+_sanitized_config = None
+
+
 @app.get("/config")
 async def get_config():
     """Get proxy configuration (sanitized)"""
-    config = proxy.config.config.copy()
+    global _sanitized_config
+    if _sanitized_config is None:
+        # Deep copy so redacting never touches the live configuration
+        config = copy.deepcopy(proxy.config.config)
+
+        # Remove sensitive information
+        if "security" in config and "api_key" in config["security"]:
+            config["security"]["api_key"] = "***REDACTED***"
 
-    # Remove sensitive information
-    if "security" in config and "api_key" in config["security"]:
-        config["security"]["api_key"] = "***REDACTED***"
+        _sanitized_config = config
 
-    return config
+    return _sanitized_config
 
 
 @app.post("/config/reload")
 async def reload_config():
     """Reload proxy configuration"""
+    global _sanitized_config
     try:
-        proxy.config.load_config()
+        # File read and YAML parsing run off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, proxy.config.load_config)
+        proxy.compile_domain_rules()
+        _sanitized_config = None
         logger.info("Configuration reloaded")
         return {"status": "success", "message": "Configuration reloaded"}
     except Exception as e:
@@ -949,45 +1541,56 @@ async def reload_config():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _port_in_use(host: str, port: int) -> bool:
+    """Probe a listen address with a bind() instead of scanning the socket table"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        return False
+    except OSError:
+        return True
+    finally:
+        sock.close()
+
+
+def _port_listener_pids(port: int) -> List[int]:
+    """PIDs listening on a TCP port, read from /proc (Linux only)"""
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    # local_address is HEXADDR:HEXPORT; state 0A is LISTEN
+                    local_port = int(fields[1].rsplit(":", 1)[1], 16)
+                    if local_port == port and fields[3] == "0A":
+                        inodes.add(f"socket:[{fields[9]}]")
+        except FileNotFoundError:
+            continue
+    if not inodes:
+        return []
+
+    pids = []
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            links = (os.readlink(f"{fd_dir}/{fd}") for fd in os.listdir(fd_dir))
+            if any(link in inodes for link in links):
+                pids.append(int(pid))
+        except OSError:
+            continue  # process exited or belongs to another user
+    return pids
+
+
 if __name__ == "__main__":
     # Run the proxy server
-    import sys
-    import subprocess
-    import os
-
     print("🔥 SHADOW WEBFETCH PROXY - STARTING...")
     print("=" * 50)
 
-    # Check for and kill existing server on same port
-    port = 8082
-    try:
-        # Find processes using port 8082
-        result = subprocess.run(
-            ["lsof", "-ti", f":{port}"], capture_output=True, text=True
-        )
-        if result.stdout.strip():
-            pids = result.stdout.strip().split("\n")
-            for pid in pids:
-                if pid:
-                    try:
-                        os.kill(int(pid), 9)
-                        print(f"🧹 Killed existing process: PID {pid}")
-                    except ProcessLookupError:
-                        pass  # Process already ended
-            print("🔄 Port cleared, ready for new server")
-        print()
-    except FileNotFoundError:
-        # lsof not available, try alternative method
-        try:
-            result = subprocess.run(
-                ["netstat", "-tlnp"], capture_output=True, text=True
-            )
-            if f":{port}" in result.stdout:
-                print(f"⚠️  Port {port} may be in use, attempting to continue...")
-                print()
-        except:
-            pass
-
     config = ProxyConfig("config.yaml")
 
     # Show startup info
@@ -995,11 +1598,68 @@ if __name__ == "__main__":
     host = proxy_config.get("host", "0.0.0.0")
     port = proxy_config.get("port", 8082)
     workers = proxy_config.get("workers", 1)
+    backlog = proxy_config.get("backlog", 2048)
+    access_log = proxy_config.get("access_log", False)
     show_requests = proxy_config.get("show_requests", True)
 
+    # Check for and kill existing server on same port
+    if _port_in_use(host, port):
+        if sys.platform.startswith("linux"):
+            pids = _port_listener_pids(port)
+        else:
+            try:
+                result = subprocess.run(
+                    ["lsof", "-ti", f":{port}"], capture_output=True, text=True
+                )
+                pids = list(map(int, result.stdout.split()))
+            except (FileNotFoundError, ValueError):
+                pids = []
+
+        # Workers of one server share a process group: kill it in one call,
+        # but only when its leader is a listener itself (not a shell
+        # pipeline, wrapper script or supervisor) and it is not our group
+        try:
+            pgids = {os.getpgid(pid) for pid in pids}
+        except ProcessLookupError:
+            pgids = set()
+        if len(pgids) == 1 and pgids <= set(pids) and os.getpgrp() not in pgids:
+            pgid = pgids.pop()
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+                print(f"🧹 Killed existing process group: PGID {pgid}")
+            except ProcessLookupError:
+                pass  # Group already gone
+        else:
+            for pid in pids:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    print(f"🧹 Killed existing process: PID {pid}")
+                except ProcessLookupError:
+                    pass  # Process already ended
+        if pids:
+            print("🔄 Port cleared, ready for new server")
+        else:
+            print(f"⚠️  Port {port} may be in use, attempting to continue...")
+        print()
+
+    # Prefer the libuv event loop and C HTTP parser (uvicorn[standard])
+    try:
+        import uvloop  # noqa: F401
+
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    try:
+        import httptools  # noqa: F401
+
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+
     print(f"🌐 Host: {host}")
     print(f"🔌 Port: {port}")
     print(f"👥 Workers: {workers}")
+    print(f"⚡ Event Loop: {loop_impl} / HTTP: {http_impl}")
     print(f"📺 Request Display: {'Enabled' if show_requests else 'Disabled'}")
     print(
         f"📁 Intelligence: {config.config.get('intelligence', {}).get('storage_path', 'intelligence')}"
@@ -1032,8 +1692,11 @@ if __name__ == "__main__":
             host=host,
             port=port,
             workers=workers,
+            loop=loop_impl,
+            http=http_impl,
+            backlog=backlog,
             log_level="info",
-            access_log=True,  # Show requests on screen
+            access_log=access_log,  # display_request already shows requests
             log_config=None,  # Use default logging format
         )
     except KeyboardInterrupt: